@@ -0,0 +1,207 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Module to generate RPM spec files for many packages at once."""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import generator
+from fontrpmspec import template
+from fontrpmspec.messages import Message as m
+
+
+def load_manifest(fn: str) -> list[dict[str, Any]]:
+    """Load a manifest written in JSON Lines.
+
+    Each line is an object which has the same properties as the config
+    file for fontrpmspec-gen plus NAME, VERSION, URL and sources.
+    Empty lines are ignored. `fn` is read from stdin if it is '-'.
+    """
+    entries = []
+    f = sys.stdin if fn == '-' else open(fn)
+    try:
+        for i, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(m([': ', ' ']).info('{}:{}'.format(
+                    fn, i)).error('Invalid JSON').message(e))
+            if not isinstance(entry, dict):
+                raise ValueError(m([': ', ' ']).info('{}:{}'.format(
+                    fn, i)).error('Not an object'))
+            entries.append(entry)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return entries
+
+
+def build(entry: dict[str, Any], outputdir: str,
+          **kwargs: Any) -> dict[str, Any]:
+    """Generate files for a package in `entry` under `outputdir`.
+
+    The spec file and fontconfig files are stored in the subdirectory
+    named after the package. `kwargs` is the default parameters for
+    `generator.generate`.
+
+    This returns dict with following key and values:
+    'name': str - Package name.
+    'error': str - Error message if failed, otherwise None.
+    'elapsed': float - Time taken in seconds.
+    """
+    start = time.monotonic()
+    kwargs = dict(kwargs, **entry)
+    name = kwargs.pop('NAME', None)
+    version = kwargs.pop('VERSION', None)
+    url = kwargs.pop('URL', None)
+    sources = kwargs.pop('sources', None)
+    # 'source' is the name in the config file for fontrpmspec-gen.
+    source = kwargs.pop('source', None)
+    sources = sources or source
+    if isinstance(sources, str):
+        sources = [sources]
+    # Options only for the command line, and the ones given above. the
+    # latter are ignored in the config file for fontrpmspec-gen as well.
+    for k in ('json_file', 'output', 'outputdir', 'name', 'version', 'url'):
+        kwargs.pop(k, None)
+    retval = {'name': name, 'error': None, 'elapsed': 0}
+    try:
+        if not name or not url or not sources:
+            raise ValueError(
+                m().error('NAME, URL and sources are required'))
+        # This is used as the output directory.
+        if not isinstance(name, str) or '/' in name or name in ('.', '..'):
+            raise ValueError(m([': ']).error('Invalid NAME').message(name))
+        templates = generator.generate(name=name, version=version, url=url,
+                                       sources=sources, **kwargs)
+        d = Path(outputdir) / name
+        d.mkdir(parents=True, exist_ok=True)
+        for f in templates['fontconfig']:
+            f.path = str(d)
+            f.write()
+        with open(d / (name + '.spec'), 'w') as f:
+            f.write(templates['spec'])
+    except Exception as e:
+        retval['error'] = '{}: {}'.format(type(e).__name__, e)
+        m([': ', ' ']).info(name).error('Failed').message(
+            retval['error']).out()
+    retval['elapsed'] = time.monotonic() - start
+    return retval
+
+
+def _build_held(*args, **kwargs):
+    # Messages are output by the parent in the order of the manifest.
+    with m.hold() as held:
+        retval = build(*args, **kwargs)
+    retval['messages'] = held
+    return retval
+
+
+def run(entries: list[dict[str, Any]], outputdir: str, jobs: int = 1,
+        **kwargs: Any) -> Iterator[dict[str, Any]]:
+    """Generate files for `entries` with `jobs` processes.
+
+    This yields the result of `build` for each entry in the same order.
+    """
+    if jobs <= 1:
+        for entry in entries:
+            yield build(entry, outputdir, **kwargs)
+        return
+    # Fonts are read in the pool for packages instead.
+    kwargs.setdefault('jobs', 1)
+    # Workers share the compiled templates.
+    template.prewarm(kwargs.get('cache', True), kwargs.get('cachedir'))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_build_held, entry, outputdir, **kwargs)
+                   for entry in entries]
+        for future in futures:
+            retval = future.result()
+            m.release(retval.pop('messages'))
+            yield retval
+
+
+def main():
+    """Endpoint function to generate RPM spec files from a manifest."""
+    parser = argparse.ArgumentParser(
+        description='Fonts RPM spec file generator for many packages',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('--outputdir',
+                        default='.',
+                        help=('Output directory. files for each package '
+                              'are stored in the subdirectory'))
+    parser.add_argument('--sourcedir', default='.', help='Source directory')
+    parser.add_argument('-j',
+                        '--jobs',
+                        type=int,
+                        default=1,
+                        help='Number of packages to generate at once')
+    parser.add_argument('--cache',
+                        action=argparse.BooleanOptionalAction,
+                        default=True,
+                        help=('Cache font metadata, downloaded files and '
+                              'compiled templates on disk.'))
+    parser.add_argument('--cachedir',
+                        help=('Cache directory. '
+                              '$XDG_CACHE_HOME/fontrpmspec is used if not'))
+    parser.add_argument('--streaming',
+                        action='store_true',
+                        help=('Extract files in archive one by one '
+                              'to reduce the disk usage'))
+    parser.add_argument('--download-jobs',
+                        type=int,
+                        default=8,
+                        help=('Number of remote source files '
+                              'to download at once'))
+    parser.add_argument('--extract-cache',
+                        action='store_true',
+                        help=('Keep extracted archives in the cache directory '
+                              'and reuse them'))
+    parser.add_argument('MANIFEST',
+                        help=('Manifest file written in JSON Lines. '
+                              'read from stdin if it is -'))
+
+    args = parser.parse_args()
+    try:
+        entries = load_manifest(args.MANIFEST)
+    except (OSError, ValueError) as e:
+        m().message(e).out()
+        sys.exit(1)
+
+    start = time.monotonic()
+    results = list(run(entries, args.outputdir, args.jobs,
+                       sourcedir=args.sourcedir,
+                       cache=args.cache,
+                       cachedir=args.cachedir,
+                       streaming=args.streaming,
+                       download_jobs=args.download_jobs,
+                       extract_cache=args.extract_cache))
+    elapsed = time.monotonic() - start
+
+    print('\n', flush=True, file=sys.stderr)
+    failed = [r for r in results if r['error'] is not None]
+    for r in results:
+        if r['error'] is None:
+            m([': ', ' ']).info(r['name']).message(
+                'generated in {:.2f}s'.format(r['elapsed'])).out()
+    for r in failed:
+        m([': ', ' ', ' ']).info(r['name']).error('failed in {:.2f}s'.format(
+            r['elapsed'])).message(r['error']).out()
+    m().message('{} packages, {} failed in {:.2f}s'.format(
+        len(results), len(failed), elapsed)).out()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Module to deal with on-disk caches."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from importlib.metadata import version, PackageNotFoundError
+from pathlib import Path
+from typing import Any, Iterator
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import font_reader as fr
+from fontrpmspec.messages import Message as m
+
+
+def default_cachedir() -> Path:
+    """Get a cache directory.
+
+    $FONTRPMSPEC_CACHE_DIR is used if set. otherwise fontrpmspec under
+    $XDG_CACHE_HOME or ~/.cache.
+    """
+    d = os.environ.get('FONTRPMSPEC_CACHE_DIR')
+    if d:
+        return Path(d)
+    xdg = os.environ.get('XDG_CACHE_HOME')
+    return (Path(xdg) if xdg else Path.home() / '.cache') / 'fontrpmspec'
+
+
+def library_version() -> str:
+    """Get a version string to invalidate caches for."""
+    try:
+        return version('fontrpmspec')
+    except PackageNotFoundError:
+        # Not installed. use the hash of the reader instead.
+        with open(fr.__file__, 'rb') as f:
+            return 'dev-' + hashlib.file_digest(f, 'sha256').hexdigest()[:16]
+
+
+def file_digest(fn: str | fr.Buffer) -> str:
+    """Get a hash of the content of `fn`.
+
+    `fn` is a filename or a buffer which has the content.
+    """
+    if isinstance(fn, fr.Buffer):
+        return hashlib.sha256(fn).hexdigest()
+    with open(fn, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def _du(path: Path) -> int:
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for n in files:
+            try:
+                total += (Path(root) / n).lstat().st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def prune(path: Path, max_size: int, depth: int = 0) -> None:
+    """Remove files under `path` in least recently used order.
+
+    This keeps the total size of files under `path` less than `max_size`.
+    If `depth` is given, directories at that depth are removed as a whole
+    instead, in order of their modification time. names starting with '.'
+    are ignored then.
+    """
+    entries = []
+    total = 0
+    if depth > 0:
+        for p in Path(path).glob('/'.join(['*'] * depth)):
+            if not p.is_dir() or any(
+                    x.startswith('.') for x in p.relative_to(path).parts):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            size = _du(p)
+            entries.append((st.st_mtime, size, p))
+            total += size
+    else:
+        for root, dirs, files in os.walk(path):
+            for n in files:
+                p = Path(root) / n
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+    entries.sort(key=lambda x: x[0])
+    for mtime, size, p in entries:
+        if total <= max_size:
+            break
+        if depth > 0:
+            shutil.rmtree(p, ignore_errors=True)
+        else:
+            p.unlink(missing_ok=True)
+        total -= size
+
+
+class MetadataCache:
+    """On-disk cache for the result of `font_reader.faces_meta_reader`.
+
+    Entries are keyed by the hash of the font file and the library version.
+    This can be shared between processes and machines.
+    """
+
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, path: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        """Initialize `MetadataCache`."""
+        self.path = (Path(path)
+                     if path is not None else default_cachedir()) / 'meta'
+        self.max_size = max_size
+        self.__version = library_version()
+        self.__failed = False
+
+    def __entry(self, digest):
+        return self.path / self.__version / digest[:2] / (digest + '.json')
+
+    def get(self, digest: str) -> list[dict[str, Any]] | None:
+        """Get a cached metadata for `digest` if any. otherwise `None`."""
+        p = self.__entry(digest)
+        try:
+            with p.open() as f:
+                data = json.load(f)
+            # Mark this as recently used.
+            os.utime(p)
+        except (OSError, ValueError):
+            return None
+        # Items are stored as pairs to keep non-string keys.
+        return [dict(pairs) for pairs in data]
+
+    def put(self, digest: str, faces: list[dict[str, Any]]) -> None:
+        """Store `faces` for `digest`."""
+        p = self.__entry(digest)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=p.parent,
+                                             delete=False) as f:
+                json.dump([list(meta.items()) for meta in faces], f)
+            os.replace(f.name, p)
+        except OSError as e:
+            if not self.__failed:
+                m([': ']).info(self.path).warning(
+                    'Unable to update cache').message(e).out()
+                self.__failed = True
+
+    def faces_meta_reader(self, fontfile: str | fr.Buffer,
+                          digest: str = None) -> list[dict[str, Any]]:
+        """Same as `font_reader.faces_meta_reader` but through the cache.
+
+        `digest` is the hash of `fontfile` if it is known already.
+        """
+        if digest is None:
+            digest = file_digest(fontfile)
+        faces = self.get(digest)
+        if faces is None:
+            faces = fr.faces_meta_reader(fontfile)
+            self.put(digest, faces)
+        return faces
+
+    def prune(self) -> None:
+        """Evict least recently used entries to fit into the size limit."""
+        if self.path.exists():
+            prune(self.path, self.max_size)
+
+
+class ExtractCache:
+    """On-disk cache for extracted source archives.
+
+    Entries are keyed by the hash of the archive and the library version.
+    Each entry has a read-only tree of the files extracted and the list of
+    all members in the archive.
+    """
+
+    DEFAULT_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+    def __init__(self, path: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        """Initialize `ExtractCache`."""
+        self.path = (Path(path)
+                     if path is not None else default_cachedir()) / 'extract'
+        self.max_size = max_size
+        self.__version = library_version()
+
+    def __entry(self, digest):
+        return self.path / self.__version / digest
+
+    def get(self, digest: str) -> tuple[str, list[list]] | None:
+        """Get a cached entry for `digest` if any. otherwise `None`.
+
+        This returns the directory where the files are extracted and
+        the list of members, which are stored by `put`.
+        """
+        d = self.__entry(digest)
+        try:
+            with (d / 'members.json').open() as f:
+                members = json.load(f)
+            # Mark this as recently used.
+            os.utime(d)
+        except (OSError, ValueError):
+            return None
+        return str(d / 'tree'), members
+
+    @contextmanager
+    def put(self, digest: str) -> Iterator[tuple[str, list[list]]]:
+        """Create an entry for `digest`.
+
+        This yields a directory to extract files into and an empty list to
+        append members to. the entry is available once the context is
+        exited without errors.
+        """
+        d = self.__entry(digest)
+        d.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=d.parent, prefix='.'))
+        try:
+            members = []
+            (tmp / 'tree').mkdir()
+            yield str(tmp / 'tree'), members
+            for root, dirs, files in os.walk(tmp / 'tree'):
+                for n in files:
+                    os.chmod(Path(root) / n, 0o444)
+            with (tmp / 'members.json').open('w') as f:
+                json.dump(members, f)
+            try:
+                tmp.rename(d)
+            except OSError:
+                # Created by another process in the meantime.
+                pass
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    def prune(self) -> None:
+        """Evict least recently used entries to fit into the size limit."""
+        if self.path.exists():
+            prune(self.path, self.max_size, depth=2)
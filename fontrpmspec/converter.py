@@ -77,6 +77,16 @@ def old2new(specfile: str, **kwargs: Any) -> str:
                                           for sources.
     'ignore_error': list[str] (optional) - A list of exception name to ignore.
     'pkgheader': dict[str, list[str]] (optional) - A list of package header lines.
+    'cache': bool (optional) - True to cache font metadata, downloaded
+                               files and compiled templates on disk.
+    'cachedir': str (optional) - Cache directory.
+    'jobs': int (optional) - Number of processes to read font metadata.
+    'streaming': bool (optional) - True to extract members in archive one
+                                   by one to reduce the disk usage.
+    'download_jobs': int (optional) - Number of remote source files to
+                                      download at once.
+    'extract_cache': bool (optional) - True to keep extracted archives in
+                                       the cache directory and reuse them.
     """
     kwargs['specfile'] = specfile
 
@@ -124,7 +134,7 @@ def old2new(specfile: str, **kwargs: Any) -> str:
         info = {
             'family': k,
             'summary': summary,
-            'fonts': ' '.join([vv['file'] for vv in v]),
+            'fonts': ' '.join(dict.fromkeys([vv['file'] for vv in v])),
             'exfonts': '%{nil}',
             'conf':
             len(families) + 10 if k in exdata['fontconfig'] else '%{nil}',
@@ -191,7 +201,8 @@ def old2new(specfile: str, **kwargs: Any) -> str:
         data['fonts'] = families[0]['fonts']
         data['pkgheader'] = families[0]['pkgheader']
 
-    return template.get(len(spec.packages), data)
+    return template.get(len(spec.packages), data, kwargs.get('cache', True),
+                        kwargs.get('cachedir'))
 
 
 def main():
@@ -212,6 +223,32 @@ def main():
     parser.add_argument('--ignore-error',
                         nargs='*',
                         help='Deal with the specific error as warning')
+    parser.add_argument('--cache',
+                        action=argparse.BooleanOptionalAction,
+                        default=True,
+                        help=('Cache font metadata, downloaded files and '
+                              'compiled templates on disk.'))
+    parser.add_argument('--cachedir',
+                        help=('Cache directory. '
+                              '$XDG_CACHE_HOME/fontrpmspec is used if not'))
+    parser.add_argument('-j',
+                        '--jobs',
+                        type=int,
+                        default=1,
+                        help='Number of processes to read font metadata')
+    parser.add_argument('--streaming',
+                        action='store_true',
+                        help=('Extract files in archive one by one '
+                              'to reduce the disk usage'))
+    parser.add_argument('--download-jobs',
+                        type=int,
+                        default=8,
+                        help=('Number of remote source files '
+                              'to download at once'))
+    parser.add_argument('--extract-cache',
+                        action='store_true',
+                        help=('Keep extracted archives in the cache directory '
+                              'and reuse them'))
     parser.add_argument('SPEC', help='Spec file to convert')
 
     args = parser.parse_args()
@@ -219,7 +256,13 @@ def main():
     templates = old2new(args.SPEC,
                         sourcedir=args.sourcedir,
                         ignore_error=args.ignore_error,
-                        foundry=args.foundry)
+                        foundry=args.foundry,
+                        cache=args.cache,
+                        cachedir=args.cachedir,
+                        jobs=args.jobs,
+                        streaming=args.streaming,
+                        download_jobs=args.download_jobs,
+                        extract_cache=args.extract_cache)
     if templates is None:
         sys.exit(1)
 
@@ -0,0 +1,347 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Module to download remote source files."""
+
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import requests
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable
+from urllib.parse import urlparse
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec.cache import default_cachedir, prune
+from fontrpmspec.messages import Message as m
+
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+
+
+def copy_response(r: requests.Response, f: BinaryIO, digest=None) -> None:
+    """Write the body of `r` into `f`.
+
+    The chunk size grows while the data comes faster than it is read.
+    `digest` is updated with the data if given.
+    """
+    chunk_size = MIN_CHUNK_SIZE
+    while True:
+        data = r.raw.read(chunk_size, decode_content=True)
+        if not data:
+            break
+        f.write(data)
+        if digest is not None:
+            digest.update(data)
+        if len(data) == chunk_size and chunk_size < MAX_CHUNK_SIZE:
+            chunk_size *= 2
+
+
+def place(src: Path, dest: Path) -> None:
+    """Put `src` at `dest` atomically.
+
+    `dest` is a hard link to `src` if possible. otherwise a copy.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists() and os.path.samefile(src, dest):
+        return
+    tmp = dest.parent / '.{}.{}.{}'.format(dest.name, os.getpid(),
+                                           threading.get_ident())
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        # Not on the same filesystem or not supported.
+        with tempfile.NamedTemporaryFile(dir=dest.parent,
+                                         prefix='.' + dest.name,
+                                         delete=False) as f:
+            with open(src, 'rb') as s:
+                shutil.copyfileobj(s, f)
+        tmp = f.name
+    os.replace(tmp, dest)
+
+
+def download(url: str, dest: str, session: requests.Session = None) -> None:
+    """Download `url` to `dest` without any caches.
+
+    `dest` doesn't appear until the download is completed.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with (session or requests).get(url, stream=True) as r:
+        r.raise_for_status()
+        with tempfile.NamedTemporaryFile(dir=dest.parent,
+                                         prefix='.' + dest.name,
+                                         delete=False) as f:
+            try:
+                copy_response(r, f)
+            except BaseException:
+                os.unlink(f.name)
+                raise
+    os.replace(f.name, dest)
+
+
+def new_session(max_per_host: int = MAX_PER_HOST) -> requests.Session:
+    """Create a session which keeps `max_per_host` connections per host."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_per_host)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class Prefetcher:
+    """Class to run download tasks in background threads.
+
+    At most `max_per_host` tasks run at once for the same host.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS,
+                 max_per_host: int = MAX_PER_HOST):
+        """Initialize `Prefetcher`."""
+        self.__executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self.__max_per_host = max_per_host
+        self.__hosts = {}
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def submit(self, url: str, func: Callable[[], Any]) -> Future:
+        """Schedule `func` to download `url`."""
+        with self.__lock:
+            sem = self.__hosts.setdefault(
+                urlparse(url).netloc,
+                threading.BoundedSemaphore(self.__max_per_host))
+
+        def run():
+            with sem:
+                return func()
+
+        return self.__executor.submit(run)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the threads.
+
+        Tasks not started yet are cancelled unless `wait` is True.
+        """
+        self.__executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def prefetch(tasks: list[tuple[str, Callable[[], None]]],
+             max_workers: int = MAX_WORKERS,
+             max_per_host: int = MAX_PER_HOST) -> list[Exception]:
+    """Run download tasks concurrently.
+
+    `tasks` is a list of the URL and a function to download it.
+    At most `max_per_host` tasks run at once for the same host.
+    This returns the list of exceptions raised by the tasks.
+    """
+    with Prefetcher(max_workers, max_per_host) as p:
+        futures = [p.submit(url, func) for url, func in tasks]
+        return [f.exception() for f in futures
+                if f.exception() is not None]
+
+
+class Downloader:
+    """Class to download remote source files without any caches."""
+
+    def __init__(self, session: requests.Session = None):
+        """Initialize `Downloader`."""
+        self.session = session if session is not None else new_session()
+
+    def fetch(self, url: str, dest: str) -> None:
+        """Download `url` to `dest`."""
+        download(url, dest, self.session)
+
+    def prune(self) -> None:
+        """Do nothing. this is for the compatibility with `DownloadCache`."""
+        pass
+
+
+class DownloadCache(Downloader):
+    """On-disk cache for remote source files.
+
+    Downloaded files are stored by the hash of the content and looked up
+    by URL. They are revalidated with ETag or Last-Modified, and
+    interrupted downloads are resumed with HTTP Range requests.
+    Files are downloaded without the cache if it isn't writable.
+    """
+
+    DEFAULT_MAX_SIZE = 4 * 1024 * 1024 * 1024
+    PARTIAL_MAX_AGE = 24 * 60 * 60
+
+    def __init__(self, path: str = None, max_size: int = DEFAULT_MAX_SIZE,
+                 session: requests.Session = None):
+        """Initialize `DownloadCache`."""
+        super().__init__(session)
+        self.path = (Path(path)
+                     if path is not None else default_cachedir()) / 'download'
+        self.max_size = max_size
+        self.__failed = False
+
+    def __index(self, key):
+        return self.path / 'index' / (key + '.json')
+
+    def __object(self, digest):
+        return self.path / 'objects' / digest[:2] / digest
+
+    def __load(self, key):
+        try:
+            with self.__index(key).open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __store(self, key, entry):
+        p = self.__index(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=p.parent,
+                                         delete=False) as f:
+            json.dump(entry, f)
+        os.replace(f.name, p)
+
+    def __lock(self, key):
+        # The partial file works as the lock for the URL as well.
+        part = self.path / 'partial' / key
+        part.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            f = open(part, 'a+b')
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(part).st_ino:
+                    return part, f
+            except FileNotFoundError:
+                pass
+            # Renamed or removed by others while waiting for the lock.
+            f.close()
+
+    def fetch(self, url: str, dest: str) -> None:
+        """Place the content of `url` at `dest` through the cache.
+
+        Fetching the same URL is serialized between processes.
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        try:
+            part, f = self.__lock(key)
+        except OSError as e:
+            self.__fallback(url, dest, e)
+            return
+        with f:
+            try:
+                try:
+                    obj = self.__fetch(key, url, part, f)
+                except requests.RequestException:
+                    raise
+                except OSError as e:
+                    self.__fallback(url, dest, e)
+                    return
+                place(obj, dest)
+            finally:
+                if part.exists() and os.fstat(f.fileno()).st_size == 0:
+                    part.unlink()
+
+    def __fallback(self, url, dest, e):
+        if not self.__failed:
+            m([': ']).info(self.path).warning(
+                'Unable to update cache').message(e).out()
+            self.__failed = True
+        download(url, dest, self.session)
+
+    def __fetch(self, key, url, part, f):
+        entry = self.__load(key)
+        obj = self.__object(entry['digest']) if entry.get('digest') else None
+        if obj is not None and not obj.exists():
+            obj = None
+        headers = {}
+        validator = entry.get('etag') or entry.get('last_modified')
+        size = os.fstat(f.fileno()).st_size
+        if obj is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        elif size > 0 and validator:
+            headers['Range'] = 'bytes={}-'.format(size)
+            headers['If-Range'] = validator
+        try:
+            r = self.session.get(url, headers=headers, stream=True)
+        except requests.RequestException as e:
+            if obj is None:
+                raise
+            m([': ']).info(url).warning(
+                'Unable to revalidate. using the cached file').message(e).out()
+            return obj
+        with r:
+            if r.status_code == 304 and obj is not None:
+                # Mark this as recently used.
+                os.utime(obj)
+                return obj
+            if r.status_code == 416 and 'Range' in headers:
+                # The partial file doesn't fit the remote file anymore.
+                f.truncate(0)
+                r.close()
+                return self.__fetch(key, url, part, f)
+            r.raise_for_status()
+            return self.__download(key, url, r, part, f)
+
+    def __download(self, key, url, r, part, f):
+        digest = hashlib.sha256()
+        if r.status_code == 206:
+            f.seek(0)
+            while data := f.read(MAX_CHUNK_SIZE):
+                digest.update(data)
+        else:
+            f.truncate(0)
+        entry = {'url': url, 'etag': r.headers.get('ETag'),
+                 'last_modified': r.headers.get('Last-Modified')}
+        # Keep validators for the partial file to resume.
+        self.__store(key, entry)
+        try:
+            copy_response(r, f, digest)
+        finally:
+            f.flush()
+        entry['digest'] = digest.hexdigest()
+        obj = self.__object(entry['digest'])
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part, obj)
+        self.__store(key, entry)
+        return obj
+
+    def prune(self) -> None:
+        """Evict least recently used files to fit into the size limit.
+
+        Partial files not updated for `PARTIAL_MAX_AGE` seconds are removed
+        as well unless they are being downloaded.
+        """
+        if (self.path / 'objects').exists():
+            prune(self.path / 'objects', self.max_size)
+        if not (self.path / 'partial').exists():
+            return
+        now = time.time()
+        for p in (self.path / 'partial').iterdir():
+            try:
+                with open(p, 'rb') as f:
+                    if now - os.fstat(
+                            f.fileno()).st_mtime < self.PARTIAL_MAX_AGE:
+                        continue
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    p.unlink()
+            except (BlockingIOError, FileNotFoundError):
+                pass
@@ -19,15 +19,22 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Module to deal with font metadata."""
 
+import gzip
+import io
+import mmap
 import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
-from fontTools.ttLib import TTFont
+from fontTools.ttLib import TTFont, TTLibError
 try:
     import _debugpath  # noqa: F401
 except ModuleNotFoundError:
     pass
 from fontrpmspec.messages import Message as m
 
+Buffer = bytes | bytearray | memoryview | mmap.mmap
+
 NAME_TABLE = {
     0: 'CopyrightNotice',
     1: 'Font_Family',
@@ -73,10 +80,344 @@ def transform_foundry(id: str) -> str:
     return FOUNDARIES[id] if id in FOUNDARIES else id
 
 
-def font_meta_reader(fontfile: str, font_number: int = 0) -> dict[str, Any]:
-    """Read metadata from `fontfile`."""
+class _NameRecord:
+    """A record in name table decoded by `SfntReader`."""
+
+    __slots__ = ('platformID', 'platEncID', 'langID', 'nameID', 'string')
+
+    def __init__(self, platformID, platEncID, langID, nameID, string):
+        self.platformID = platformID
+        self.platEncID = platEncID
+        self.langID = langID
+        self.nameID = nameID
+        self.string = string
+
+    def toStr(self) -> str:
+        """Decode a string in the same way as fontTools does."""
+        if self.platformID == 0 or (self.platformID == 3
+                                    and self.platEncID in (0, 1, 10)):
+            if len(self.string) % 2:
+                raise ValueError('Odd length of UTF-16 string')
+            s = self.string.decode('utf_16_be')
+        elif self.platformID == 1 and self.platEncID == 0 and self.langID == 0:
+            s = self.string.decode('mac_roman')
+        else:
+            raise ValueError('Unsupported encoding')
+        # Same as fontTools: narrow the double-encoded UTF-16BE string.
+        if all(ord(c) == 0 if i % 2 == 0 else
+               (0x20 <= ord(c) <= 0x7e or ord(c) in (0x09, 0x0a, 0x0d))
+               for i, c in enumerate(s)):
+            s = ''.join(c for c in s[1::2])
+        return s
+
+
+class _Table:
+    """Decoded table by `SfntReader`."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _display_name(fontfile: str | Buffer) -> str:
+    return '<memory>' if isinstance(fontfile, Buffer) else str(fontfile)
+
+
+def _ttfont(fontfile: str | Buffer, font_number: int = 0) -> TTFont:
+    if isinstance(fontfile, Buffer):
+        fontfile = io.BytesIO(fontfile)
+    # Load tables lazily so that only the table directory and the tables
+    # touched are read.
+    return TTFont(fontfile, fontNumber=font_number, lazy=True)
+
+
+class SfntReader:
+    """Minimal sfnt reader working on a memory-mapped font file.
+
+    This decodes only the table directory and `name`, `OS/2` and `head`
+    tables, which is enough for `font_meta_reader`. ValueError or
+    struct.error is raised for anything it doesn't deal with. use fontTools
+    for them.
+    """
+
+    SFNT_VERSIONS = (b'\x00\x01\x00\x00', b'OTTO', b'true')
+
+    def __init__(self, fontfile: str | Buffer, font_number: int = 0):
+        """Initialize `SfntReader`.
+
+        `fontfile` is a filename or a buffer which has the content of a font.
+        """
+        if isinstance(fontfile, Buffer):
+            self.__mm = fontfile
+            self.__owned = False
+        else:
+            with open(fontfile, 'rb') as f:
+                self.__mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__owned = True
+        try:
+            self.__parse_directory(font_number)
+        except Exception:
+            self.close()
+            raise
+        self.__cache = {}
+
+    def __enter__(self):
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args):
+        """Exit the runtime context and unmap the file."""
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the font file."""
+        if self.__owned:
+            self.__mm.close()
+
+    def __parse_directory(self, font_number):
+        mm = self.__mm
+        offset = 0
+        if mm[:4] == b'ttcf':
+            (num_fonts,) = struct.unpack_from('>L', mm, 8)
+            if font_number < 0 or font_number >= num_fonts:
+                raise ValueError('Invalid font number')
+            (offset,) = struct.unpack_from('>L', mm, 12 + font_number * 4)
+        elif font_number > 0:
+            raise ValueError('Not a font collection')
+        version = bytes(mm[offset:offset + 4])
+        if version not in SfntReader.SFNT_VERSIONS:
+            raise ValueError('Unsupported sfnt version')
+        self.sfntVersion = version.decode('latin-1')
+        (num_tables,) = struct.unpack_from('>H', mm, offset + 4)
+        self.tables = {}
+        for i in range(num_tables):
+            tag, _, toff, tlen = struct.unpack_from('>4sLLL', mm,
+                                                    offset + 12 + i * 16)
+            if toff + tlen > len(mm):
+                raise ValueError('Table out of range')
+            self.tables[tag.decode('latin-1')] = (toff, tlen)
+
+    def __contains__(self, tag: str) -> bool:
+        """Whether or not the font has `tag` table."""
+        return tag in self.tables
+
+    def __getitem__(self, tag: str) -> _Table:
+        """Get a decoded table for `tag`."""
+        if tag not in self.__cache:
+            if tag not in self.tables:
+                raise KeyError(tag)
+            offset, length = self.tables[tag]
+            match tag:
+                case 'name':
+                    table = self.__decode_name(offset, length)
+                case 'OS/2':
+                    table = self.__decode_os2(offset, length)
+                case 'head':
+                    table = self.__decode_head(offset, length)
+                case _:
+                    raise ValueError('Unsupported table: {}'.format(tag))
+            self.__cache[tag] = table
+        return self.__cache[tag]
+
+    def __decode_name(self, offset, length):
+        mm = self.__mm
+        _, count, string_offset = struct.unpack_from('>HHH', mm, offset)
+        if 6 + count * 12 > length:
+            raise ValueError('Malformed name table')
+        names = []
+        strings = offset + string_offset
+        end = offset + length
+        for i in range(count):
+            (platformID, platEncID, langID, nameID, slen,
+             soff) = struct.unpack_from('>HHHHHH', mm, offset + 6 + i * 12)
+            if strings + soff + slen > end:
+                raise ValueError('Malformed name record')
+            names.append(
+                _NameRecord(platformID, platEncID, langID, nameID,
+                            bytes(mm[strings + soff:strings + soff + slen])))
+        return _Table(names=names)
+
+    def __decode_os2(self, offset, length):
+        if length < 78:
+            raise ValueError('Short OS/2 table')
+        mm = self.__mm
+        (family_class,) = struct.unpack_from('>h', mm, offset + 30)
+        panose = struct.unpack_from('>10B', mm, offset + 32)
+        (vendor,) = struct.unpack_from('>4s', mm, offset + 58)
+        return _Table(sFamilyClass=family_class,
+                      panose=_Table(bFamilyType=panose[0],
+                                    bSerifStyle=panose[1],
+                                    bWeight=panose[2],
+                                    bProportion=panose[3]),
+                      achVendID=vendor.decode('ascii'))
+
+    def __decode_head(self, offset, length):
+        if length < 54:
+            raise ValueError('Short head table')
+        (revision,) = struct.unpack_from('>l', self.__mm, offset + 4)
+        return _Table(fontRevision=revision / (1 << 16))
+
+
+class PcfReader:
+    """Minimal PCF reader to decode the properties table only.
+
+    The file is read sequentially so that .pcf.gz is decompressed
+    incrementally, and reading stops right after the properties table.
+    ValueError or struct.error is raised for malformed files.
+    """
+
+    MAGIC = b'\x01fcp'
+    GZIP_MAGIC = b'\x1f\x8b'
+    PCF_PROPERTIES = 1 << 0
+    PCF_BYTE_MASK = 1 << 2
+
+    def __init__(self, fontfile: str | Buffer):
+        """Initialize `PcfReader`.
+
+        `fontfile` is a filename or a buffer which has the content of a font.
+        """
+        if isinstance(fontfile, Buffer):
+            f = io.BytesIO(fontfile)
+            if fontfile[:2] == PcfReader.GZIP_MAGIC:
+                f = gzip.GzipFile(fileobj=f)
+        elif str(fontfile).endswith('.gz'):
+            f = gzip.open(fontfile, 'rb')
+        else:
+            f = open(fontfile, 'rb')
+        with f:
+            self.properties = self.__read_properties(f)
+
+    @staticmethod
+    def is_pcf(fontfile: str | Buffer) -> bool:
+        """Whether or not `fontfile` is supposed to be a PCF font."""
+        if isinstance(fontfile, Buffer):
+            return fontfile[:4] == PcfReader.MAGIC or fontfile[:2] == (
+                PcfReader.GZIP_MAGIC)
+        return str(fontfile).endswith(('.pcf', '.pcf.gz'))
+
+    def __contains__(self, tag: str) -> bool:
+        """PCF fonts don't have any sfnt tables."""
+        return False
+
+    def __read(self, f, size):
+        data = f.read(size)
+        if len(data) != size:
+            raise ValueError('Truncated PCF file')
+        return data
+
+    def __read_properties(self, f):
+        header = self.__read(f, 8)
+        if header[:4] != PcfReader.MAGIC:
+            raise ValueError('Not a PCF font')
+        (count,) = struct.unpack('<l', header[4:])
+        if count < 0 or count > 64:
+            raise ValueError('Invalid number of tables')
+        toc = struct.unpack('<{}l'.format(count * 4),
+                            self.__read(f, count * 16))
+        for i in range(0, len(toc), 4):
+            if toc[i] == PcfReader.PCF_PROPERTIES:
+                size, offset = toc[i + 2:i + 4]
+                break
+        else:
+            raise ValueError('No properties table')
+        if offset < 8 + count * 16:
+            raise ValueError('Malformed properties table')
+        # Forward seek on a gzip stream decompresses and discards data.
+        f.seek(offset)
+        (fmt,) = struct.unpack('<l', self.__read(f, 4))
+        bo = '>' if fmt & PcfReader.PCF_BYTE_MASK else '<'
+        (nprops,) = struct.unpack(bo + 'l', self.__read(f, 4))
+        if nprops < 0 or 8 + nprops * 9 > size:
+            raise ValueError('Malformed properties table')
+        props = [struct.unpack(bo + 'lbl', self.__read(f, 9))
+                 for i in range(nprops)]
+        self.__read(f, (4 - nprops % 4) % 4)
+        (string_size,) = struct.unpack(bo + 'l', self.__read(f, 4))
+        if string_size < 0 or string_size > size:
+            raise ValueError('Malformed properties table')
+        strings = self.__read(f, string_size)
+
+        def cstr(offset):
+            if offset < 0 or offset >= len(strings):
+                raise ValueError('Invalid string offset')
+            return strings[offset:strings.find(b'\0', offset)].decode(
+                'latin-1')
+
+        return {cstr(name): cstr(value) if is_string else value
+                for name, is_string, value in props}
+
+
+def font_meta_reader(fontfile: str | Buffer,
+                     font_number: int = 0) -> dict[str, Any]:
+    """Read metadata from `fontfile`.
+
+    `fontfile` is a filename or a buffer which has the content of a font.
+    The tables are decoded straight from the memory-mapped file or the buffer
+    where possible. fontTools is used as a fallback for anything else.
+    """
+    if PcfReader.is_pcf(fontfile):
+        return _read_pcf_meta(PcfReader(fontfile), fontfile)
+    try:
+        with SfntReader(fontfile, font_number) as font:
+            return _read_meta(font, fontfile, font_number)
+    except (ValueError, struct.error):
+        pass
+    with _ttfont(fontfile, font_number) as font:
+        return _read_meta(font, fontfile, font_number)
+
+
+def num_faces(fontfile: str | Buffer) -> int:
+    """Get the number of faces in `fontfile`."""
+    if isinstance(fontfile, Buffer):
+        header = bytes(fontfile[:12])
+    else:
+        with open(fontfile, 'rb') as f:
+            header = f.read(12)
+    if header[:4] == b'ttcf' and len(header) == 12:
+        return struct.unpack('>L', header[8:])[0]
+    return 1
+
+
+def faces_meta_reader(fontfile: str | Buffer,
+                      max_workers: int = None) -> list[dict[str, Any]]:
+    """Read metadata for all the faces in `fontfile`.
+
+    Faces in a font collection are scanned concurrently. the result is
+    ordered by the face index.
+    """
+    n = num_faces(fontfile)
+    if n == 1:
+        return [font_meta_reader(fontfile)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(lambda i: font_meta_reader(fontfile, i), range(n)))
+
+
+def is_variable(fontfile: str | Buffer) -> bool:
+    """Whether or not any face in `fontfile` is a variable font.
+
+    This looks at the table directory only. A face with fvar table is
+    a variable font as fontconfig does, which covers both of gvar and CFF2.
+    """
+    try:
+        for i in range(num_faces(fontfile)):
+            try:
+                with SfntReader(fontfile, i) as font:
+                    if 'fvar' in font:
+                        return True
+                continue
+            except (ValueError, struct.error):
+                pass
+            with _ttfont(fontfile, i) as font:
+                if 'fvar' in font:
+                    return True
+    except (OSError, TTLibError):
+        pass
+    return False
+
+
+def _read_meta(font: TTFont | SfntReader, fontfile: str | Buffer,
+               font_number: int) -> dict[str, Any]:
     meta_data = dict()
-    font = TTFont(fontfile, fontNumber=font_number)
     # variable fmd denotes font meta data or fonts meta attributes
     for fmd in font['name'].names:
         if (fmd.platformID == 3
@@ -88,10 +429,46 @@ def font_meta_reader(fontfile: str, font_number: int = 0) -> dict[str, Any]:
     meta_data['family'] = get_better_family(meta_data)
     meta_data[
         'type'] = 'OpenType' if font.sfntVersion == 'OTTO' else 'TrueType'
-    fc = FontClass(meta_data['family'], fontfile, faceId=font_number)
+    fc = FontClass(meta_data['family'], _display_name(fontfile),
+                   faceId=font_number, font=font)
     meta_data['alias'] = fc.get_alias_name()
-    meta_data['hashint'] = True if 'prep' in font or 'cvt' in font or 'fpgm' in font else False
-    meta_data['variable'] = True if 'fvar' in font and 'gvar' in font else False
+    # Tags are 4 bytes long.
+    meta_data['hashint'] = any(t in font for t in ('prep', 'cvt ', 'fpgm'))
+    # Same as `is_variable`.
+    meta_data['variable'] = 'fvar' in font
+    return meta_data
+
+
+def _read_pcf_meta(font: PcfReader,
+                   fontfile: str | Buffer) -> dict[str, Any]:
+    props = font.properties
+    # Fields in XLFD: -FOUNDRY-FAMILY_NAME-WEIGHT_NAME-SLANT-...
+    xlfd = str(props.get('FONT', '')).split('-')
+    xlfd = xlfd[1:] if len(xlfd) == 15 else [''] * 14
+    meta_data = dict()
+    for key, prop, idx in (('Font_Family', 'FAMILY_NAME', 1),
+                           ('SubFamily', 'WEIGHT_NAME', 2),
+                           ('Full_Font_Name', 'FACE_NAME', None),
+                           ('CopyrightNotice', 'COPYRIGHT', None)):
+        value = props.get(prop, xlfd[idx] if idx is not None else '')
+        if value:
+            meta_data[key] = str(value)
+    if 'Font_Family' not in meta_data:
+        raise ValueError('No family name in PCF font: {}'.format(
+            _display_name(fontfile)))
+    meta_data['foundry'] = transform_foundry(
+        str(props.get('FOUNDRY', xlfd[0])))
+    meta_data['font_revision'] = 0.0
+    meta_data['family'] = get_better_family(meta_data)
+    meta_data['type'] = 'Bitmap'
+    if str(props.get('SPACING', xlfd[10])).upper() in ('M', 'C'):
+        meta_data['alias'] = ['monospace']
+    else:
+        fc = FontClass(meta_data['family'], _display_name(fontfile),
+                       font=font)
+        meta_data['alias'] = fc.get_alias_name()
+    meta_data['hashint'] = False
+    meta_data['variable'] = False
     return meta_data
 
 
@@ -106,19 +483,30 @@ def get_better_family(meta: dict[str, Any]) -> str:
     return family
 
 
-def group(families: dict[str, Any]) -> dict[str, dict[str, Any]]:
-    """Restructure metadata against related family names."""
+def group(
+    families: dict[str | tuple[str, int], Any]
+) -> dict[str, list[dict[str, Any]]]:
+    """Restructure metadata against related family names.
+
+    A key of `families` is a filename or a tuple of a filename and a face
+    index. All the faces in a font collection are put into the group of
+    the face which has the smallest index so that a file belongs to one
+    group only. Groups are ordered by the length of the family name.
+    """
+    primary = {}
+    faces = []
+    for k, v in families.items():
+        fn, idx = k if isinstance(k, tuple) else (k, 0)
+        if fn not in primary or idx < primary[fn][0]:
+            primary[fn] = (idx, v)
+        faces.append((fn, idx, v))
     retval = {}
-    x = sorted(families.items(), key=lambda x: len(x[1]['family']))
-    for k, v in x:
-        found = False
-        family = v['family'] if not v['variable'] else v['family'] + ' VF'
-        for f in retval.keys():
-            if re.fullmatch(r'{}'.format(f), family):
-                retval[family].append({'fontinfo': v, 'file': k})
-                found = True
-        if not found:
-            retval[family] = [{'fontinfo': v, 'file': k}]
+    x = sorted(faces, key=lambda x: len(primary[x[0]][1]['family']))
+    for fn, idx, v in x:
+        p = primary[fn][1]
+        family = p['family'] if not p['variable'] else p['family'] + ' VF'
+        retval.setdefault(family, []).append({'fontinfo': v, 'file': fn,
+                                              'index': idx})
     return retval
 
 
@@ -134,19 +522,30 @@ class FontClass:
     TYPE_MATH = 6
     TYPE_END = 7
 
-    def __init__(self, family: str, fn: str, faceId: int = -1):
-        """Initialize `FontClass`."""
+    def __init__(self, family: str, fn: str, faceId: int = -1,
+                 font: TTFont | SfntReader = None):
+        """Initialize `FontClass`.
+
+        If `font` is given, tables are read from it instead of opening `fn`
+        again. the caller keeps the ownership of `font`.
+        """
         self.file = fn
         self.index = faceId
         self.family = family
+        self.font = font
 
     def __get_type_id(self, n):
         return 1 << n
 
     def __guess_class(self):
         retval = 0
-        tt = TTFont(self.file, fontNumber=self.index)
-        os2 = tt['OS/2']
+        if self.font is not None:
+            if 'OS/2' not in self.font:
+                return retval
+            os2 = self.font['OS/2']
+        else:
+            with TTFont(self.file, fontNumber=self.index, lazy=True) as tt:
+                os2 = tt['OS/2']
         cls_id = (os2.sFamilyClass >> 8) & 0xff
         subcls_id = os2.sFamilyClass & 0xff
         match cls_id:
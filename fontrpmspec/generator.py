@@ -127,6 +127,16 @@ def generate(name: str, sources: str | list[str], url: str,
     'rpmautospec': bool (optional) - True to use rpmautospec otherwise False.
     'autorelease_opt': str (optional) - Extra arguments to %autorelease.
     'pkgheader': dict[str, list[str]] (optional) - Package header lines.
+    'cache': bool (optional) - True to cache font metadata, downloaded
+                               files and compiled templates on disk.
+    'cachedir': str (optional) - Cache directory.
+    'jobs': int (optional) - Number of processes to read font metadata.
+    'streaming': bool (optional) - True to extract members in archive one
+                                   by one to reduce the disk usage.
+    'download_jobs': int (optional) - Number of remote source files to
+                                      download at once.
+    'extract_cache': bool (optional) - True to keep extracted archives in
+                                       the cache directory and reuse them.
 
     This function returns dict with following key and values:
     'spec': str - RPM spec
@@ -197,7 +207,7 @@ def generate(name: str, sources: str | list[str], url: str,
             kwargs['summary'].format(family=v[0]['fontinfo']['family'],
                                      alias=kwargs['alias'],
                                      type=v[0]['fontinfo']['type']),
-            'fonts': ' '.join([vv['file'] for vv in v]),
+            'fonts': ' '.join(dict.fromkeys([vv['file'] for vv in v])),
             'exfonts': '%{nil}',
             'conf': len(families) + 10,
             'exconf': '%{nil}',
@@ -208,9 +218,10 @@ def generate(name: str, sources: str | list[str], url: str,
             'pkgheader': '\n'.join(pkgheader)
         }
         c = FontconfigGenerator()
-        for a in [vvv for vv in v for vvv in vv['fontinfo']['alias']]:
-            c.add(a, v[0]['fontinfo']['family'], kwargs['lang'],
-                  v[0]['fontinfo']['hashint'])
+        for vv in v:
+            for a in vv['fontinfo']['alias']:
+                c.add(a, vv['fontinfo']['family'], kwargs['lang'],
+                      v[0]['fontinfo']['hashint'])
         c.set_fn(
             kwargs['priority']
             if not v[0]['fontinfo']['variable'] else kwargs['vf_priority'],
@@ -267,7 +278,9 @@ def generate(name: str, sources: str | list[str], url: str,
         data['fonts'] = families[0]['fonts']
         data['pkgheader'] = families[0]['pkgheader']
 
-    retval.update(template.get(len(families), data))
+    retval.update(template.get(len(families), data,
+                               kwargs.get('cache', True),
+                               kwargs.get('cachedir')))
     return retval
 
 
@@ -472,6 +485,32 @@ def main():
     parser.add_argument('--ignore-error',
                         nargs='*',
                         help='Deal with the specific error as warning')
+    parser.add_argument('--cache',
+                        action=argparse.BooleanOptionalAction,
+                        default=True,
+                        help=('Cache font metadata, downloaded files and '
+                              'compiled templates on disk.'))
+    parser.add_argument('--cachedir',
+                        help=('Cache directory. '
+                              '$XDG_CACHE_HOME/fontrpmspec is used if not'))
+    parser.add_argument('-j',
+                        '--jobs',
+                        type=int,
+                        default=1,
+                        help='Number of processes to read font metadata')
+    parser.add_argument('--streaming',
+                        action='store_true',
+                        help=('Extract files in archive one by one '
+                              'to reduce the disk usage'))
+    parser.add_argument('--download-jobs',
+                        type=int,
+                        default=8,
+                        help=('Number of remote source files '
+                              'to download at once'))
+    parser.add_argument('--extract-cache',
+                        action='store_true',
+                        help=('Keep extracted archives in the cache directory '
+                              'and reuse them'))
     parser.add_argument('NAME', help='Package name')
     parser.add_argument('VERSION', nargs='?', help='Package version')
     parser.add_argument('URL', help='Project URL')
@@ -504,7 +543,13 @@ def main():
                          ignore_error=args.ignore_error,
                          rpmautospec=args.rpmautospec,
                          autorelease_opt=args.autorelease_opt,
-                         foundry=args.foundry)
+                         foundry=args.foundry,
+                         cache=args.cache,
+                         cachedir=args.cachedir,
+                         jobs=args.jobs,
+                         streaming=args.streaming,
+                         download_jobs=args.download_jobs,
+                         extract_cache=args.extract_cache)
     if templates is None:
         sys.exit(1)
 
@@ -3,19 +3,22 @@
 """Module to generate a test case based on tmt"""
 
 import argparse
-import os
 import re
 import shutil
 import subprocess
 import sys
 import tempfile
+from fontTools.ttLib import TTLibError
 from pathlib import Path
 try:
     import _debugpath  # noqa: F401
 except ModuleNotFoundError:
     pass
+from fontrpmspec import font_reader as fr
 from fontrpmspec.messages import Message as m
 from fontrpmspec import sources as src
+from fontrpmspec.langcoverage import LangCoverage
+from fontrpmspec.rpm_reader import RpmReader
 
 
 def generate_listdata(pkgname, alias, family, languages):
@@ -46,7 +49,7 @@ def generate_plan(planfile, has_fc_conf, has_lang, add_prepare, pkgname,
         if add_prepare:
             if is_single_plan:
                 if is_local:
-                    tmpl_pkg = f'{planfile.parents[1].absolute() / 'noarch'}'
+                    tmpl_pkg = f'{planfile.parents[1].absolute() / "noarch"}'
                 else:
                     tmpl_pkg = '\n' + '\n'.join([f'        - {s}' for s in list(set(pkglist))])
             else:
@@ -102,16 +105,13 @@ def main():
 
     args = parser.parse_args()
 
-    cwd = os.getcwd()
     if args.outputdir is None:
         args.outputdir = args.REPO
     if not shutil.which('fedpkg'):
         m([': ', '']).error('E').message('fedpkg is not installed').out()
         sys.exit(1)
-    if not shutil.which('rpm'):
-        m([': ', '']).error('E').message('rpm is not installed').out()
-        sys.exit(1)
-    if not shutil.which('fc-query'):
+    coverage = LangCoverage.get()
+    if coverage is None and not shutil.which('fc-query'):
         m([': ', '']).error('E').message('fc-query is not installed').out()
         sys.exit(1)
     if not shutil.which('tmt'):
@@ -153,26 +153,41 @@ def main():
             alist = []
             llist = []
             pfamily = None
-            for f in s:
+            files = list(s)
+            if coverage is not None:
+                langs = coverage.languages_many([f.fullname for f in files
+                                                 if f.is_font()])
+            else:
+                langs = {}
+            for f in files:
                 if f.is_fontconfig():
                     has_fc_conf = True
                 if f.is_font():
                     has_fonts = True
-                    ss = subprocess.run(['fc-query', '-f', '%{lang}\n', f.fullname],
-                                        stdout=subprocess.PIPE)
-                    if ss.returncode == 0:
-                        ll = list(filter(None, re.split(r'[,|\n]',
-                                                        ss.stdout.decode('utf-8'))))
-                    else:
+                    ll = langs.get(f.fullname)
+                    if ll is None and shutil.which('fc-query'):
+                        ss = subprocess.run(['fc-query', '-f', '%{lang}\n', f.fullname],
+                                            stdout=subprocess.PIPE)
+                        if ss.returncode == 0:
+                            ll = list(filter(None, re.split(r'[,|\n]',
+                                                            ss.stdout.decode('utf-8'))))
+                    if ll is None:
                         m([': ', ': ', '']).warning('W').message(f.fullname).message('not supported').out()
                         ll = []
                     has_lang = has_lang or len(ll) > 0
                     if len(ll) == 1:
                         llist = ll
-                    ss = subprocess.run(['fc-scan', '-f', '%{family[0]}\n', f.fullname],
-                                        stdout=subprocess.PIPE)
-                    if ss.returncode == 0:
-                        pfamily = ss.stdout.decode('utf-8').splitlines()[0]
+                    if shutil.which('fc-scan'):
+                        ss = subprocess.run(['fc-scan', '-f', '%{family[0]}\n', f.fullname],
+                                            stdout=subprocess.PIPE)
+                        if ss.returncode == 0:
+                            pfamily = ss.stdout.decode('utf-8').splitlines()[0]
+                    else:
+                        try:
+                            meta = fr.font_meta_reader(str(f.fullname))
+                            pfamily = meta['family']
+                        except (OSError, ValueError, TTLibError):
+                            pass
                 try:
                     if f.families is not None:
                         flist += f.families
@@ -190,10 +205,8 @@ def main():
             print(flist)
             alist = list(dict.fromkeys(alist))
             llist = list(dict.fromkeys(llist))
-            ss = subprocess.run(['rpm', '-qp', '--qf', '%{name}', str(pkg)],
-                                stdout=subprocess.PIPE)
-            os.chdir(cwd)
-            pkgname = ss.stdout.decode('utf-8')
+            s.cleanup()
+            pkgname = RpmReader(str(pkg)).name
             if not has_fonts:
                 m([': ']).info(pkgname).message('Skipping. No tmt plan is needed.').out()
                 continue
@@ -0,0 +1,206 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Module to figure out languages supported by fonts."""
+
+import ctypes
+import ctypes.util
+import re
+import struct
+from pathlib import Path
+from fontTools.ttLib import TTFont, TTLibError
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import font_reader as fr
+
+
+def bitset(codepoints) -> int:
+    """Build a bitset from the iterable of code points."""
+    codepoints = list(codepoints)
+    if not codepoints:
+        return 0
+    buf = bytearray(max(codepoints) // 8 + 1)
+    for c in codepoints:
+        buf[c >> 3] |= 1 << (c & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def npages(bits: int) -> int:
+    """Count pages of 256 code points which has any bits in `bits`."""
+    b = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    return sum(1 for i in range(0, len(b), 32) if any(b[i:i + 32]))
+
+
+class LangCoverage:
+    """Class to compute language coverage of fonts like fontconfig does.
+
+    Orthographies are held as bitsets of code points. a language is
+    supported by a font if the font covers all the code points in it.
+    """
+
+    # Languages in OS/2 ulCodePageRange1, which fontconfig deals with
+    # exclusively. see FcFreeTypeLangSet.
+    EXCLUSIVE_LANGS = {17: 'ja', 18: 'zh-cn', 19: 'ko', 20: 'zh-tw'}
+
+    def __init__(self, charsets: dict[str, int]):
+        """Initialize `LangCoverage` with bitsets for each language."""
+        self._charsets = charsets
+
+    @classmethod
+    def from_fontconfig(cls, library: str = None):
+        """Build `LangCoverage` from orthographies compiled in fontconfig."""
+        lib = ctypes.CDLL(library or ctypes.util.find_library('fontconfig')
+                          or 'libfontconfig.so.1')
+        lib.FcGetLangs.restype = ctypes.c_void_p
+        lib.FcStrSetDestroy.argtypes = [ctypes.c_void_p]
+        lib.FcStrListCreate.argtypes = [ctypes.c_void_p]
+        lib.FcStrListCreate.restype = ctypes.c_void_p
+        lib.FcStrListNext.argtypes = [ctypes.c_void_p]
+        lib.FcStrListNext.restype = ctypes.c_char_p
+        lib.FcStrListDone.argtypes = [ctypes.c_void_p]
+        lib.FcLangGetCharSet.argtypes = [ctypes.c_char_p]
+        lib.FcLangGetCharSet.restype = ctypes.c_void_p
+        lib.FcLangSetCreate.restype = ctypes.c_void_p
+        lib.FcLangSetDestroy.argtypes = [ctypes.c_void_p]
+        lib.FcLangSetAdd.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        lib.FcPatternCreate.restype = ctypes.c_void_p
+        lib.FcPatternDestroy.argtypes = [ctypes.c_void_p]
+        lib.FcPatternAddLangSet.argtypes = [ctypes.c_void_p, ctypes.c_char_p,
+                                            ctypes.c_void_p]
+        lib.FcPatternFormat.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        lib.FcPatternFormat.restype = ctypes.c_void_p
+        lib.FcStrFree.argtypes = [ctypes.c_void_p]
+        pagemap = ctypes.c_uint32 * 8
+        for f in (lib.FcCharSetFirstPage, lib.FcCharSetNextPage):
+            f.argtypes = [ctypes.c_void_p, pagemap,
+                          ctypes.POINTER(ctypes.c_uint32)]
+            f.restype = ctypes.c_uint32
+        charset_done = 0xffffffff
+
+        def strset_to_list(strset):
+            retval = []
+            strlist = lib.FcStrListCreate(strset)
+            while (s := lib.FcStrListNext(strlist)) is not None:
+                retval.append(s.decode('ascii'))
+            lib.FcStrListDone(strlist)
+            lib.FcStrSetDestroy(strset)
+            return retval
+
+        # Sort languages in the same order as fc-query outputs.
+        langset = lib.FcLangSetCreate()
+        for lang in strset_to_list(lib.FcGetLangs()):
+            lib.FcLangSetAdd(langset, lang.encode('ascii'))
+        pat = lib.FcPatternCreate()
+        lib.FcPatternAddLangSet(pat, b'lang', langset)
+        s = lib.FcPatternFormat(pat, b'%{lang}')
+        langs = ctypes.string_at(s).decode('ascii').split('|')
+        lib.FcStrFree(s)
+        lib.FcPatternDestroy(pat)
+        lib.FcLangSetDestroy(langset)
+
+        charsets = {}
+        for lang in langs:
+            cs = lib.FcLangGetCharSet(lang.encode('ascii'))
+            m = pagemap()
+            nxt = ctypes.c_uint32()
+            bits = 0
+            base = lib.FcCharSetFirstPage(cs, m, ctypes.byref(nxt))
+            while base != charset_done:
+                page = 0
+                for i in range(8):
+                    page |= m[i] << (32 * i)
+                bits |= page << base
+                base = lib.FcCharSetNextPage(cs, m, ctypes.byref(nxt))
+            charsets[lang] = bits
+        return cls(charsets)
+
+    @classmethod
+    def from_orth_dir(cls, path: str):
+        """Build `LangCoverage` from fontconfig's .orth files in `path`."""
+        def parse(fn, seen):
+            retval = set()
+            if fn in seen:
+                return retval
+            seen.add(fn)
+            with open(fn, encoding='utf-8') as f:
+                for line in f:
+                    line = line.split('#', 1)[0].strip()
+                    if not line:
+                        continue
+                    ma = re.fullmatch(r'include\s+(\S+)', line)
+                    if ma:
+                        retval |= parse(fn.parent / ma.group(1), seen)
+                        continue
+                    r = [int(x, 16) for x in re.split(r'-|\.\.', line)]
+                    retval |= set(range(r[0], r[-1] + 1))
+            return retval
+
+        charsets = {}
+        for fn in sorted(Path(path).glob('*.orth')):
+            lang = fn.stem.replace('_', '-').lower()
+            charsets[lang] = bitset(parse(fn, set()))
+        return cls(charsets)
+
+    @classmethod
+    def get(cls):
+        """Get `LangCoverage` from fontconfig if available.
+
+        `None` if not.
+        """
+        try:
+            return cls.from_fontconfig()
+        except (OSError, AttributeError):
+            return None
+
+    def __exclusive(self, font):
+        if 'OS/2' not in font:
+            return None
+        os2 = font['OS/2']
+        if os2.version < 1:
+            return None
+        retval = None
+        for bit, lang in LangCoverage.EXCLUSIVE_LANGS.items():
+            if os2.ulCodePageRange1 & (1 << bit):
+                if retval is not None:
+                    # Multiple exclusive languages are declared.
+                    return None
+                retval = lang
+        return retval
+
+    def __face_languages(self, font):
+        cmap = font.getBestCmap() or {}
+        bits = bitset(c for c, g in cmap.items() if g != '.notdef')
+        exclusive = self.__exclusive(font)
+        retval = []
+        for lang, cs in self._charsets.items():
+            # Other languages in EXCLUSIVE_LANGS are supported only if
+            # they have the same pages as the one declared.
+            if exclusive is not None and exclusive in self._charsets and (
+                    lang in LangCoverage.EXCLUSIVE_LANGS.values()) and (
+                        cs != self._charsets[exclusive]):
+                continue
+            if cs & bits == cs:
+                retval.append(lang)
+        return retval
+
+    def languages(self, fontfile: str) -> list[str] | None:
+        """Get a list of languages supported by `fontfile`.
+
+        Languages for each face are concatenated for font collections.
+        `None` if `fontfile` isn't supported.
+        """
+        retval = []
+        try:
+            for i in range(fr.num_faces(fontfile)):
+                with TTFont(fontfile, fontNumber=i, lazy=True) as font:
+                    retval += self.__face_languages(font)
+        except (OSError, TTLibError, ValueError, struct.error):
+            # Broken tables, e.g. truncated cmap.
+            return None
+        return retval
+
+    def languages_many(self,
+                       fontfiles: list[str]) -> dict[str, list[str] | None]:
+        """Get languages for all `fontfiles` at once."""
+        return {f: self.languages(f) for f in fontfiles}
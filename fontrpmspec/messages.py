@@ -20,8 +20,12 @@
 
 import re
 import sys
+import threading
+from contextlib import contextmanager
 from termcolor import colored
-from typing import Self
+from typing import Iterator, Self
+
+_local = threading.local()
 
 
 class Message:
@@ -74,7 +78,39 @@ class Message:
     def out(self) -> None:
         """Output all the strings held in this object into stderr."""
         if not Message().quiet:
-            print(self._message, flush=True, file=sys.stderr)
+            held = getattr(_local, 'held', None)
+            if held is not None:
+                held.append(self._message)
+            else:
+                print(self._message, flush=True, file=sys.stderr)
+
+    @staticmethod
+    @contextmanager
+    def hold() -> Iterator[list[str]]:
+        """Hold messages output in the current thread instead of printing.
+
+        This yields a list of them, which can be printed later with
+        `Message.release` to keep the order of messages.
+        """
+        prev = getattr(_local, 'held', None)
+        _local.held = []
+        try:
+            yield _local.held
+        finally:
+            _local.held = prev
+
+    @staticmethod
+    def release(messages: list[str]) -> None:
+        """Output messages held by `Message.hold`.
+
+        They are held again if `Message.hold` is in effect in this thread.
+        """
+        held = getattr(_local, 'held', None)
+        for msg in messages:
+            if held is not None:
+                held.append(msg)
+            else:
+                print(msg, flush=True, file=sys.stderr)
 
     def throw(self, klass, exclude: list[str] = []) -> None:
         """Raise exception."""
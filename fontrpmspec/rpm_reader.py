@@ -0,0 +1,288 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Module to read RPM packages.
+
+Payloads compressed with gzip, bzip2, xz or lzma are read without any
+external tools. zstd, which Fedora uses, needs Python 3.14 or later or
+the zstandard module. otherwise rpm2cpio is used.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import stat
+import struct
+import subprocess
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Iterator
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+
+try:
+    from compression import zstd
+except ModuleNotFoundError:
+    try:
+        import zstandard as zstd
+    except ModuleNotFoundError:
+        zstd = None
+
+LEAD_MAGIC = b'\xed\xab\xee\xdb'
+HEADER_MAGIC = b'\x8e\xad\xe8'
+CPIO_MAGICS = (b'070701', b'070702')
+
+RPMTAG_NAME = 1000
+RPMTAG_VERSION = 1001
+RPMTAG_RELEASE = 1002
+RPMTAG_ARCH = 1022
+RPMTAG_OLDFILENAMES = 1027
+RPMTAG_FILESIZES = 1028
+RPMTAG_FILEMODES = 1030
+RPMTAG_DIRINDEXES = 1116
+RPMTAG_BASENAMES = 1117
+RPMTAG_DIRNAMES = 1118
+RPMTAG_PAYLOADFORMAT = 1124
+RPMTAG_PAYLOADCOMPRESSOR = 1125
+RPMTAG_LONGFILESIZES = 5008
+
+RPM_INT8_TYPE = 2
+RPM_INT16_TYPE = 3
+RPM_INT32_TYPE = 4
+RPM_INT64_TYPE = 5
+RPM_STRING_TYPE = 6
+RPM_BIN_TYPE = 7
+RPM_STRING_ARRAY_TYPE = 8
+RPM_I18NSTRING_TYPE = 9
+
+
+class Header:
+    """Header structure in RPM. values are decoded on demand."""
+
+    def __init__(self, f: BinaryIO, pad: bool = False):
+        """Read a header from `f`.
+
+        If `pad` is True, the padding to 8 bytes boundary is skipped,
+        which is used for the signature header.
+        """
+        intro = _read(f, 16)
+        if intro[:3] != HEADER_MAGIC:
+            raise ValueError('Invalid RPM header')
+        nindex, hsize = struct.unpack('>LL', intro[8:])
+        if nindex > 0xffff or hsize > 256 * 1024 * 1024:
+            raise ValueError('Too large RPM header')
+        index = _read(f, nindex * 16)
+        self.__store = _read(f, hsize)
+        if pad:
+            _read(f, (8 - hsize % 8) % 8)
+        self.__index = {}
+        for i in range(nindex):
+            tag, typ, offset, count = struct.unpack_from('>lLlL', index,
+                                                         i * 16)
+            if offset < 0 or offset > hsize:
+                raise ValueError('Invalid RPM header entry')
+            self.__index[tag] = (typ, offset, count)
+
+    def __contains__(self, tag: int) -> bool:
+        """Whether or not the header has `tag`."""
+        return tag in self.__index
+
+    def get(self, tag: int, default: Any = None) -> Any:
+        """Get a value for `tag` if any. otherwise `default`."""
+        if tag not in self.__index:
+            return default
+        typ, offset, count = self.__index[tag]
+        store = self.__store
+        match typ:
+            case 2 | 3 | 4 | 5:
+                fmt = {RPM_INT8_TYPE: 'B', RPM_INT16_TYPE: 'H',
+                       RPM_INT32_TYPE: 'L', RPM_INT64_TYPE: 'Q'}[typ]
+                return list(struct.unpack_from('>{}{}'.format(count, fmt),
+                                               store, offset))
+            case 6:
+                return store[offset:store.index(b'\0', offset)].decode(
+                    'utf-8', 'surrogateescape')
+            case 7:
+                return store[offset:offset + count]
+            case 8 | 9:
+                retval = []
+                for i in range(count):
+                    end = store.index(b'\0', offset)
+                    retval.append(store[offset:end].decode(
+                        'utf-8', 'surrogateescape'))
+                    offset = end + 1
+                return retval
+            case _:
+                raise ValueError('Unsupported type in RPM header: {}'.format(
+                    typ))
+
+
+def _read(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError('Truncated RPM file')
+    return data
+
+
+class RpmReader:
+    """Class to read the header and the payload in RPM package.
+
+    ValueError is raised for files which isn't RPM.
+    """
+
+    def __init__(self, fn: str):
+        """Initialize `RpmReader` with RPM package `fn`."""
+        self.__fn = fn
+        with open(fn, 'rb') as f:
+            lead = _read(f, 96)
+            if lead[:4] != LEAD_MAGIC:
+                raise ValueError('Not a RPM package: {}'.format(fn))
+            self.signature = Header(f, pad=True)
+            self.header = Header(f)
+            self.__payload_offset = f.tell()
+
+    @property
+    def name(self) -> str:
+        """Obtain the package name."""
+        return self.header.get(RPMTAG_NAME)
+
+    @property
+    def version(self) -> str:
+        """Obtain the package version."""
+        return self.header.get(RPMTAG_VERSION)
+
+    @property
+    def release(self) -> str:
+        """Obtain the package release."""
+        return self.header.get(RPMTAG_RELEASE)
+
+    @property
+    def files(self) -> list[str]:
+        """Obtain the list of files in the package."""
+        if RPMTAG_BASENAMES in self.header:
+            dirnames = self.header.get(RPMTAG_DIRNAMES)
+            return [dirnames[i] + b for i, b in zip(
+                self.header.get(RPMTAG_DIRINDEXES),
+                self.header.get(RPMTAG_BASENAMES))]
+        return self.header.get(RPMTAG_OLDFILENAMES, [])
+
+    @contextmanager
+    def payload(self) -> Iterator[BinaryIO]:
+        """Open the decompressed cpio archive in the package.
+
+        rpm2cpio is used if the compressor isn't supported in Python.
+        """
+        fmt = self.header.get(RPMTAG_PAYLOADFORMAT, 'cpio')
+        if fmt != 'cpio':
+            raise ValueError('Unsupported payload format: {}'.format(fmt))
+        compressor = self.header.get(RPMTAG_PAYLOADCOMPRESSOR, 'gzip')
+        opener = {
+            'gzip': lambda f: gzip.GzipFile(fileobj=f),
+            'bzip2': bz2.BZ2File,
+            'xz': lzma.LZMAFile,
+            'lzma': lzma.LZMAFile,
+        }.get(compressor)
+        if compressor == 'zstd' and zstd is not None:
+            if hasattr(zstd, 'ZstdFile'):
+                opener = zstd.ZstdFile
+            else:
+                opener = zstd.ZstdDecompressor().stream_reader
+        if opener is not None:
+            with open(self.__fn, 'rb') as f:
+                f.seek(self.__payload_offset)
+                with opener(f) as p:
+                    yield p
+            return
+        rpm2cpio = shutil.which('rpm2cpio')
+        if rpm2cpio is None:
+            raise ValueError(
+                ('Unsupported payload compressor: {}. '
+                 'rpm2cpio is required').format(compressor))
+        with subprocess.Popen([rpm2cpio, self.__fn],
+                              stdout=subprocess.PIPE) as proc:
+            try:
+                yield proc.stdout
+            finally:
+                proc.stdout.close()
+                proc.wait()
+
+    def members(
+        self
+    ) -> Iterator[tuple[str, int, Callable[[], BinaryIO] | None, str | None]]:
+        """Iterate files in the payload in a single sequential pass.
+
+        This yields a tuple of the member name, the size, a function to
+        open it and the name of the file which a link points to, same as
+        `sources.iter_tar`. the function has to be called before requesting
+        the next one.
+        """
+        deferred = {}
+        with self.payload() as p:
+            for name, mode, size, ino, nlink, reader in iter_cpio(p):
+                if stat.S_ISLNK(mode):
+                    link = os.path.normpath(
+                        os.path.join(os.path.dirname(name),
+                                     reader().read().decode(
+                                         'utf-8', 'surrogateescape')))
+                    yield name, 0, None, link
+                elif stat.S_ISREG(mode):
+                    if nlink > 1 and size == 0:
+                        # Hard links. the content follows the last one.
+                        deferred.setdefault(ino, []).append(name)
+                        continue
+                    yield name, size, reader, None
+                    for n in deferred.pop(ino, []):
+                        yield n, 0, None, name
+
+
+class _CpioMember:
+    """File-like object to read a member in cpio archive."""
+
+    def __init__(self, f, size):
+        self.__f = f
+        self.__remain = size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.__remain:
+            size = self.__remain
+        data = _read(self.__f, size)
+        self.__remain -= len(data)
+        return data
+
+    def skip(self) -> None:
+        while self.__remain > 0:
+            self.read(min(self.__remain, 1024 * 1024))
+
+
+def iter_cpio(
+    f: BinaryIO
+) -> Iterator[tuple[str, int, int, int, int, Callable[[], BinaryIO]]]:
+    """Iterate members in cpio archive of newc format from stream `f`.
+
+    This yields a tuple of the name, the mode, the size, the inode number,
+    the number of links and a function to open it.
+    """
+    while True:
+        header = _read(f, 110)
+        if header[:6] not in CPIO_MAGICS:
+            raise ValueError('Unsupported cpio format')
+        fields = [int(header[6 + i * 8:14 + i * 8], 16) for i in range(13)]
+        ino, mode, nlink, size, namesize = (fields[0], fields[1], fields[4],
+                                            fields[6], fields[11])
+        name = _read(f, namesize)[:-1].decode('utf-8', 'surrogateescape')
+        _read(f, (4 - (110 + namesize) % 4) % 4)
+        if name == 'TRAILER!!!':
+            break
+        member = _CpioMember(f, size)
+        yield (os.path.normpath(name), mode, size, ino, nlink,
+               lambda member=member: member)
+        member.skip()
+        _read(f, (4 - size % 4) % 4)
@@ -18,14 +18,21 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Module to deal with source files."""
 
+import hashlib
+import io
+import mmap
 import os
+import queue
 import re
-import requests
 import shutil
-import subprocess
+import struct
 import sys
+import tarfile
 import tempfile
+import threading
 import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
 from lxml import etree
 from pathlib import Path
 try:
@@ -33,9 +40,36 @@ try:
 except ModuleNotFoundError:
     pass
 from fontrpmspec import font_reader as fr
+from fontrpmspec.cache import ExtractCache, MetadataCache, file_digest
+from fontrpmspec.download import (Downloader, DownloadCache, MAX_PER_HOST,
+                                  Prefetcher, download, new_session,
+                                  prefetch)
 from fontrpmspec.messages import Message as m
+from fontrpmspec.rpm_reader import RpmReader
 from urllib.parse import urlparse, parse_qs
-from typing import Iterator, Any
+from typing import Any, BinaryIO, Callable, Iterator
+
+
+def safe_name(fn: str) -> str:
+    """Adjust a member name in archive not to point outside."""
+    fixedfn = os.path.join(
+        *list(filter(lambda x: x not in ('..', '/'),
+                     Path(os.path.normpath(fn)).parts))) if fn.startswith(
+                         ('..', '/')) else fn
+    if fn != fixedfn:
+        m([': ', '']).info(fn).warning(
+            ('This file are going to be created outside of '
+             'the extracted directory. adjusting...')).out()
+    return fixedfn
+
+
+def copy_hashed(i: BinaryIO, o: BinaryIO) -> str:
+    """Copy `i` to `o` and returns SHA-256 of the data in hex."""
+    h = hashlib.sha256()
+    while data := i.read(1024 * 1024):
+        h.update(data)
+        o.write(data)
+    return h.hexdigest()
 
 
 def unpack_zip(fn, path, *args):
@@ -46,14 +80,7 @@ def unpack_zip(fn, path, *args):
 
     zipf = zipfile.ZipFile(fn, 'r')
     for fn in zipf.namelist():
-        fixedfn = os.path.join(
-            *list(filter(lambda x: x != '..',
-                         Path(os.path.normpath(fn)).parts))) if fn.startswith(
-                             '..') else fn
-        if fn != fixedfn:
-            m([': ', '']).info(fn).warning(
-                ('This file are going to be created outside of '
-                 'the extracted directory. adjusting...')).out()
+        fixedfn = safe_name(fn)
         info = zipf.getinfo(fn)
         if info.is_dir():
             (d / fixedfn).mkdir(parents=True)
@@ -69,19 +96,19 @@ def unpack_rpm(fn, path, *args):
     if not d.exists():
         d.mkdir(parents=True)
 
-    os.chdir(path)
-    rpm2cpiocmd = shutil.which('rpm2cpio')
-    if rpm2cpiocmd is None:
-        m([': '
-           ]).info('rpm2cpio').error('command not found.').throw(RuntimeError)
-    rpm2cpio = subprocess.Popen([rpm2cpiocmd, fn], stdout=subprocess.PIPE)
-    subprocess.check_call(('cpio', '-i', '-d'),
-                          stdin=rpm2cpio.stdout,
-                          stderr=subprocess.DEVNULL)
-    rpm2cpio.communicate()
-    if rpm2cpio.returncode != 0:
-        m([': ']).error('Unpacking RPM failed with return code').message(
-            rpm2cpio.returncode).throw(RuntimeError)
+    # Links may come before the targets as the payload is sorted by path.
+    links = []
+    for name, size, opener, link in iter_rpm(fn):
+        p = d / name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        if link is None:
+            with opener() as i, p.open(mode='wb') as o:
+                shutil.copyfileobj(i, o)
+        else:
+            links.append((p, link))
+    for p, link in links:
+        if (d / link).is_file():
+            shutil.copyfile(d / link, p)
 
 
 try:
@@ -100,61 +127,317 @@ shutil.register_unpack_format('zip', ['.zip'],
                               description='Custom ZIP unpacker')
 
 
+def iter_tar(
+    fn: str
+) -> Iterator[tuple[str, int, Callable[[], BinaryIO], str | None]]:
+    """Iterate files in tar file in a single sequential pass.
+
+    This yields a tuple of the member name, the size, a function to open it
+    and the name of the member which a link points to. the function has to
+    be called before requesting the next one.
+    """
+    with tarfile.open(fn, 'r|*') as tar:
+        for info in tar:
+            if info.isfile():
+                yield (safe_name(info.name), info.size,
+                       lambda info=info: tar.extractfile(info), None)
+            elif info.issym() or info.islnk():
+                link = info.linkname if info.islnk() else os.path.join(
+                    os.path.dirname(info.name), info.linkname)
+                yield (safe_name(info.name), 0, None,
+                       safe_name(os.path.normpath(link)))
+
+
+def iter_rpm(
+    fn: str
+) -> Iterator[tuple[str, int, Callable[[], BinaryIO], str | None]]:
+    """Iterate files in RPM package in a single sequential pass.
+
+    Same as `iter_tar` but for the payload in RPM package.
+    """
+    for name, size, opener, link in RpmReader(fn).members():
+        yield (safe_name(name), size, opener,
+               safe_name(link) if link is not None else None)
+
+
+MEMBER_ITERATORS = {
+    'rpm': iter_rpm,
+    'tar': iter_tar,
+    'gztar': iter_tar,
+    'bztar': iter_tar,
+    'xztar': iter_tar,
+}
+
+
+def archive_format(fn: str) -> str | None:
+    """Get a format name of archive `fn` registered in shutil if any."""
+    for name, extensions, desc in shutil.get_unpack_formats():
+        if str(fn).endswith(tuple(extensions)):
+            return name
+    return None
+
+
+class PathMatcher:
+    """Matcher for names in archive by prefixes, such as `excludepath`."""
+
+    __slots__ = ('__prefixes',)
+
+    def __init__(self, prefixes: list[str] = []):
+        """Initialize `PathMatcher` with a list of prefixes."""
+        self.__prefixes = tuple(prefixes)
+
+    def __bool__(self) -> bool:
+        """Whether or not any prefixes are given."""
+        return bool(self.__prefixes)
+
+    def match(self, name: str) -> bool:
+        """Whether or not `name` starts with any of the prefixes."""
+        return bool(self.__prefixes) and name.startswith(self.__prefixes)
+
+    def match_dir(self, name: str) -> bool:
+        """Whether or not all files under directory `name` are matched."""
+        return self.match(name + '/')
+
+
+def scan_tree(
+    top: str,
+    prune: Callable[[str], bool] = None
+) -> Iterator[tuple[str, os.DirEntry]]:
+    """Iterate files under `top` with `os.scandir`.
+
+    This yields a tuple of the path relative to `top` and the entry, which
+    caches the type and the stat. directories that `prune` returns True
+    for its relative path are not descended.
+    """
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        with os.scandir(os.path.join(top, rel)) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        dirs = []
+        for e in entries:
+            name = rel + e.name
+            if e.is_dir(follow_symlinks=False):
+                if prune is None or not prune(name):
+                    dirs.append(name + '/')
+            else:
+                yield name, e
+        stack.extend(reversed(dirs))
+
+
+# Number of files extracted ahead of the ones being processed.
+UNPACK_QUEUE_SIZE = 64
+
+# Properties not computed yet.
+_UNSET = object()
+
+KIND_LICENSE = 1 << 0
+KIND_DOC = 1 << 1
+KIND_FONTCONFIG = 1 << 2
+KIND_FONT = 1 << 3
+KIND_FONTCOLLECTION = 1 << 4
+KIND_XML = 1 << 5
+
+LICENSE_PATTERN = re.compile(r'(?i:license|notice)|OFL|MIT|GPL')
+DOC_PATTERN = re.compile(r'(?i:readme|news)')
+FONTCONFIG_PATTERN = re.compile(r'(?i:fontconfig)')
+SUFFIX_KINDS = {
+    '.otf': KIND_FONT,
+    '.ttf': KIND_FONT,
+    '.pcf': KIND_FONT,
+    '.otc': KIND_FONT | KIND_FONTCOLLECTION,
+    '.ttc': KIND_FONT | KIND_FONTCOLLECTION,
+    '.conf': KIND_FONTCONFIG,
+    '.txt': KIND_DOC,
+    '.xml': KIND_XML,
+}
+# The order to decide `File.kind` in.
+KIND_NAMES = [
+    (KIND_LICENSE, 'license'),
+    (KIND_DOC, 'doc'),
+    (KIND_FONTCONFIG, 'fontconfig'),
+    (KIND_FONT, 'font'),
+    (KIND_XML, 'xml'),
+]
+
+
+XPATH_FAMILIES = etree.XPath(
+    '/fontconfig/alias[not(descendant::prefer)]/family/text()')
+XPATH_MATCH_FAMILIES = etree.XPath(
+    '/fontconfig/match/edit[@name=\'family\']/string/text()')
+XPATH_ALIASES = etree.XPath('/fontconfig/alias/default/family/text()')
+XPATH_MATCH_ALIASES = etree.XPath(
+    ('/fontconfig/match[not(@target) or contains(@target, \'pattern\')]'
+     '/test[@name=\'family\']/string/text()'))
+XPATH_LANGUAGES = etree.XPath(
+    '/fontconfig/match/test[@name=\'lang\']/string/text()')
+XPATH_MAP_FROM = etree.XPath(
+    ('/fontconfig/match[@target=\'scan\']/test[@name=\'family\']'
+     '/string/text()'))
+XPATH_MAP_TO = etree.XPath(
+    ('/fontconfig/match[@target=\'scan\']/edit[@name=\'family\']'
+     '/string/text()'))
+XPATH_APPSTREAM = etree.XPath('/component[@type="font"]')
+
+
+def classify(name: str) -> int:
+    """Get the kinds of file `name` as flags of KIND_*.
+
+    This is decided from the name only.
+    """
+    i = name.rfind('.')
+    kind = SUFFIX_KINDS.get(name[i:], 0) if i >= 0 else 0
+    if kind == KIND_DOC and name == 'requirements.txt':
+        kind = 0
+    elif name.endswith('.pcf.gz'):
+        kind = KIND_FONT
+    if LICENSE_PATTERN.search(name):
+        kind |= KIND_LICENSE
+    if DOC_PATTERN.search(name):
+        kind |= KIND_DOC
+    if FONTCONFIG_PATTERN.search(name):
+        kind |= KIND_FONTCONFIG
+    return kind
+
+
 class File:
     """File class to deal with files in archive."""
 
+    # There may be many instances for large archives.
+    __slots__ = ('_filename', '_prefixdir', '_digest', '__families',
+                 '__aliases', '__langs', '__is_source', '__is_vf',
+                 '__basename', '__fullname', '__kinds', '__is_appstream',
+                 '__tree', '__family_map')
+
     def __init__(self, fn: str, prefixdir: str, is_source: bool = False):
-        """Initialize `File`."""
+        """Initialize `File`.
+
+        Properties are computed on demand and kept.
+        """
         self._filename = fn
         self._prefixdir = prefixdir
+        # Set by `Source` if the hash is computed while extracting.
+        self._digest = None
         self.__families = None
         self.__aliases = None
         self.__langs = None
         self.__is_source = is_source
+        self.__is_vf = None
+        self.__basename = None
+        self.__fullname = _UNSET
+        self.__kinds = None
+        self.__is_appstream = None
+        self.__tree = None
+        self.__family_map = False
+
+    def record(self) -> 'File':
+        """Obtain the object to keep after the next file is requested.
+
+        This is the object itself unless the content is released then.
+        """
+        return self
 
     def __name(self, name):
-        p = Path(name)
-        d = p.parent
-        n = p.name
-        if not d.parts[1:]:
-            if d == '.':
-                return str(d / n)
-            else:
-                return n
-        else:
-            return str(d.relative_to(*d.parts[:1]) / n)
+        # Same as dropping the top directory with Path but much faster.
+        parts = [x for x in name.split('/') if x and x != '.']
+        if name.startswith('/'):
+            parts.insert(0, '/')
+        if len(parts) <= 2:
+            return parts[-1] if parts and parts[-1] != '/' else ''
+        return '/'.join(parts[1:])
 
     @property
     def name(self) -> str:
         """Obtain filename."""
-        u = urlparse(self.realname, allow_fragments=True)
-        if not u.scheme:
-            return self.__name(self.realname)
-        elif u.fragment:
-            return Path(u.fragment).name
-        elif u.query:
-            return Path(u.query).name
-        else:
-            return Path(u.path).name
+        if self.__basename is None:
+            u = urlparse(self.realname, allow_fragments=True) if (
+                ':' in self.realname) else None
+            if u is None or not u.scheme:
+                self.__basename = self.__name(self.realname)
+            elif u.fragment:
+                self.__basename = Path(u.fragment).name
+            elif u.query:
+                self.__basename = Path(u.query).name
+            else:
+                self.__basename = Path(u.path).name
+        return self.__basename
+
+    @property
+    def kinds(self) -> int:
+        """Obtain the kinds of file as flags of KIND_*."""
+        if self.__kinds is None:
+            self.__kinds = classify(self.name)
+        return self.__kinds
+
+    @property
+    def kind(self) -> str | None:
+        """Obtain the kind of file to deal with.
+
+        This is one of 'license', 'doc', 'fontconfig', 'font' and 'xml',
+        in that priority order. `None` for others.
+        """
+        kinds = self.kinds
+        for flag, name in KIND_NAMES:
+            if kinds & flag:
+                return name
+        return None
 
     @property
     def realname(self) -> str:
         """Obtain filename as it is."""
         return self._filename
 
+    def open(self) -> BinaryIO:
+        """Open the file to read in binary mode."""
+        return open(self.fullname, 'rb')
+
+    def content(self) -> str | fr.Buffer:
+        """Obtain the content to pass to the readers in `font_reader`.
+
+        This is a filename for files on disk.
+        """
+        return self.fullname
+
+    def digest(self, content: str | fr.Buffer = None) -> str:
+        """Obtain SHA-256 of the content in hex.
+
+        `content` is what `content()` returns, to avoid reading it again.
+        """
+        if self._digest is None:
+            self._digest = file_digest(
+                content if content is not None else self.content())
+        return self._digest
+
+    def _parse(self) -> etree._ElementTree:
+        # Parsed once and shared with all the properties.
+        if self.__tree is None:
+            with self.open() as f:
+                self.__tree = etree.parse(f)
+        return self.__tree
+
     @property
-    def fullname(self) -> str:
+    def fullname(self) -> Path:
         """Obtain filename with fullpath."""
-        u = urlparse(self.realname, allow_fragments=True)
-        f = Path(self.prefix) / (self.realname if not u.scheme else self.name)
-        if f.is_symlink():
-            sym = f.readlink()
-            if not sym.is_relative_to(f.parent):
-                f = sym.relative_to(f.parent)
-            elif not sym.is_relative_to(self.prefix):
-                # Symlink may points to the absolute path.
-                f = Path(self.prefix) / sym.relative_to('/')
-        return f
+        if self.__fullname is None:
+            # Not a symlink nor URL. Path is too large to keep for all files.
+            return Path(self.prefix, self.realname)
+        if self.__fullname is _UNSET:
+            has_scheme = ':' in self.realname and urlparse(
+                self.realname, allow_fragments=True).scheme
+            f = Path(self.prefix) / (
+                self.name if has_scheme else self.realname)
+            if f.is_symlink():
+                sym = f.readlink()
+                if not sym.is_relative_to(f.parent):
+                    f = sym.relative_to(f.parent)
+                elif not sym.is_relative_to(self.prefix):
+                    # Symlink may points to the absolute path.
+                    f = Path(self.prefix) / sym.relative_to('/')
+            elif not has_scheme:
+                self.__fullname = None
+                return f
+            self.__fullname = f
+        return self.__fullname
 
     @property
     def prefix(self):
@@ -184,25 +467,22 @@ class File:
         """Obtain the list of family names if available. otherwise `None`."""
         if self.is_fontconfig():
             if self.__families is None:
-                tree = etree.parse(self.fullname)
-                family_list = tree.xpath(
-                    '/fontconfig/alias[not(descendant::prefer)]/family/text()')
+                tree = self._parse()
+                family_list = XPATH_FAMILIES(tree)
                 if not family_list:
-                    family_list = tree.xpath(
-                        ('/fontconfig/match/edit[@name=\'family\']'
-                         '/string/text()'))
+                    family_list = XPATH_MATCH_FAMILIES(tree)
                     if not family_list:
                         raise ValueError(
                             m([': ']).info(self.name).error(
                                 'Unable to guess the targeted family name'))
+                names = set(family_list)
                 fmap = self.family_map()
                 if fmap:
                     for k, v in fmap.items():
-                        if k in family_list:
-                            family_list.append(v)
+                        if k in names:
+                            names.add(v)
 
-                family_list = list(set(family_list))
-                family_list = [s.strip() for s in family_list]
+                family_list = [s.strip() for s in names]
                 family_list.sort(key=lambda s: len(s))
                 if len(family_list) > 1:
                     basename = family_list[0]
@@ -226,13 +506,10 @@ class File:
         """Obtain the list of alias names if available. otherwise `None`."""
         if self.is_fontconfig():
             if self.__aliases is None:
-                tree = etree.parse(self.fullname)
-                alias_list = tree.xpath(
-                    '/fontconfig/alias/default/family/text()')
+                tree = self._parse()
+                alias_list = XPATH_ALIASES(tree)
                 if not alias_list:
-                    alias_list = tree.xpath(
-                        ('/fontconfig/match[not(@target) or contains(@target, \'pattern\')]/test[@name=\'family\']'
-                         '/string/text()'))
+                    alias_list = XPATH_MATCH_ALIASES(tree)
                     if not alias_list:
                         return None
 
@@ -260,8 +537,7 @@ class File:
         """Obtain the list of language names if available. otherwise `None`."""
         if self.is_fontconfig():
             if self.__langs is None:
-                tree = etree.parse(self.fullname)
-                lang_list = tree.xpath('/fontconfig/match/test[@name=\'lang\']/string/text()')
+                lang_list = XPATH_LANGUAGES(self._parse())
 
                 lang_list = [s.strip() for s in lang_list]
                 lang_list.sort(key=lambda s: len(s))
@@ -274,59 +550,31 @@ class File:
 
     def is_license(self) -> bool:
         """Wheter or not the targeted file is a license file."""
-        LICENSES = ['OFL', 'MIT', 'GPL']
-        if re.search(r'(?i:license|notice)', self.name) or re.search(
-                re.compile('|'.join(LICENSES)), self.name):
-            return True
-        else:
-            return False
+        return bool(self.kinds & KIND_LICENSE)
 
     def is_doc(self) -> bool:
         """Whether or not the targeted file is a document."""
-        if re.search(r'(?i:readme|news.*)', self.name):
-            return True
-        elif self.name.endswith('.txt') and self.name != 'requirements.txt':
-            return True
-        else:
-            return False
+        return bool(self.kinds & KIND_DOC)
 
     def is_font(self) -> bool:
         """Whether or not the targeted file is a font."""
-        if self.name.endswith('.otf') or self.name.endswith('.otc') or self.name.endswith('.ttf') or self.name.endswith('.ttc') or self.name.endswith('.pcf') or self.name.endswith('.pcf.gz'):
-            return True
-        else:
-            return False
+        return bool(self.kinds & KIND_FONT)
 
     def is_fontcollection(self) -> bool:
         """Whether or not the targeted file is a font."""
-        if self.name.endswith('.otc') or self.name.endswith('.ttc'):
-            return True
-        else:
-            return False
+        return bool(self.kinds & KIND_FONTCOLLECTION)
 
     def is_vf(self) -> bool:
         """Whether or not the target font file is a variable font."""
         if not self.is_font():
             return False
-        fcquery = shutil.which('fc-query')
-        if fcquery is None:
-            raise RuntimeError('fc-query is not installed.')
-        p = subprocess.Popen([fcquery, '-f', '%{variable}\n', self.fullname],
-                             stdout=subprocess.PIPE)
-        (out, err) = p.communicate()
-        if p.returncode == 0:
-            b = out.decode('utf-8').splitlines()
-            return any([i == 'True' for i in b])
-        else:
-            return False
+        if self.__is_vf is None:
+            self.__is_vf = fr.is_variable(self.content())
+        return self.__is_vf
 
     def is_fontconfig(self) -> bool:
         """Whether or not the targeted file is a fontconfig config file."""
-        if re.search(r'(?i:fontconfig)',
-                     self.name) or self.name.endswith('.conf'):
-            return True
-        else:
-            return False
+        return bool(self.kinds & KIND_FONTCONFIG)
 
     def has_family_map(self) -> bool:
         """Whether or not Dict of family names are generated."""
@@ -336,21 +584,38 @@ class File:
         """Get a table from old name to new name defined in fontconfig file."""
         if not self.is_fontconfig():
             return None
-        else:
-            tree = etree.parse(self.fullname)
-            mapfrom = tree.xpath(
-                ('/fontconfig/match[@target=\'scan\']/test[@name=\'family\']'
-                 '/string/text()'))
-            mapto = tree.xpath(
-                ('/fontconfig/match[@target=\'scan\']/edit[@name=\'family\']'
-                 '/string/text()'))
+        if self.__family_map is False:
+            tree = self._parse()
+            mapfrom = XPATH_MAP_FROM(tree)
+            mapto = XPATH_MAP_TO(tree)
             if len(mapfrom) != len(mapto):
-                return None
+                self.__family_map = None
             else:
-                familymap = {}
-                for i in range(len(mapfrom)):
-                    familymap[mapfrom[i]] = mapto[i]
-                return familymap
+                self.__family_map = dict(zip(mapfrom, mapto))
+        return self.__family_map
+
+    def is_excluded(self,
+                    excludepath: list[str] | PathMatcher = []) -> bool:
+        """Whether or not the targeted file is a font excluded.
+
+        `excludepath` is applied to fonts only.
+        """
+        if not isinstance(excludepath, PathMatcher):
+            excludepath = PathMatcher(excludepath)
+        return excludepath.match(self.name) and self.kind == 'font'
+
+    def is_needed(self,
+                  excludepath: list[str] | PathMatcher = []) -> bool:
+        """Whether or not the targeted file is needed for packaging.
+
+        This is decided from the name only, so that unnecessary files in
+        archive can be skipped before extracting them.
+        """
+        if self.is_excluded(excludepath):
+            return False
+        # AppStream files are told from the content.
+        return bool(self.kinds & (KIND_LICENSE | KIND_DOC | KIND_FONTCONFIG
+                                  | KIND_FONT | KIND_XML))
 
     def is_source(self) -> bool:
         """Whether or not the targeted file is a source archive."""
@@ -358,74 +623,420 @@ class File:
 
     def is_appstream_file(self) -> bool:
         """Whether or not the targeted file is an appstream file."""
-        if self.name.endswith('.xml'):
+        if not self.kinds & KIND_XML:
+            return False
+        if self.__is_appstream is None:
             try:
-                tree = etree.parse(self.fullname)
-                s = tree.xpath('/component[@type="font"]')
-                if not s:
-                    return False
-                else:
-                    return True
+                self.__is_appstream = bool(XPATH_APPSTREAM(self._parse()))
             except etree.XMLSyntaxError:
-                return False
-        else:
-            return False
+                self.__is_appstream = False
+        return self.__is_appstream
+
+
+class ArchiveFile(File):
+    """File class to deal with a file in ZIP archive without extracting it."""
+
+    __slots__ = ('__zipf', '__info', '__mm')
+
+    def __init__(self, fn: str, prefixdir: str, zipf: zipfile.ZipFile,
+                 info: zipfile.ZipInfo, mm: mmap.mmap = None):
+        """Initialize `ArchiveFile` with a member `info` in `zipf`.
+
+        `mm` is the memory-mapped archive to read STORED members from.
+        """
+        super().__init__(fn, prefixdir)
+        self.__zipf = zipf
+        self.__info = info
+        self.__mm = mm
+
+    @property
+    def member(self) -> tuple[str, str]:
+        """Obtain the archive filename and the member name in it."""
+        return (self.prefix, self.__info.filename)
+
+    def open(self) -> BinaryIO:
+        """Open the member to read in binary mode."""
+        return self.__zipf.open(self.__info)
+
+    def content(self) -> fr.Buffer:
+        """Obtain the content to pass to the readers in `font_reader`.
+
+        This is a slice of the memory-mapped archive for STORED members.
+        otherwise the decompressed data.
+        """
+        info = self.__info
+        mm = self.__mm
+        if mm is not None and info.compress_type == zipfile.ZIP_STORED and (
+                not info.flag_bits & 0x1) and (
+                    mm[info.header_offset:info.header_offset + 4] ==
+                    b'PK\x03\x04'):
+            # Skip the local file header.
+            n, e = struct.unpack_from('<HH', mm, info.header_offset + 26)
+            start = info.header_offset + 30 + n + e
+            if start + info.file_size <= len(mm):
+                return memoryview(mm)[start:start + info.file_size]
+        return self.__zipf.read(info)
+
+
+class SpooledFile(File):
+    """File class to deal with a file in archive held in a spooled file."""
+
+    __slots__ = ('__spool', '__size', '__max_size')
+
+    def __init__(self, fn: str, prefixdir: str,
+                 spool: tempfile.SpooledTemporaryFile, size: int,
+                 max_size: int):
+        """Initialize `SpooledFile` with `spool` which has the content.
+
+        `spool` is expected to be rolled over to disk if `size` is larger
+        than `max_size`.
+        """
+        super().__init__(fn, prefixdir)
+        self.__spool = spool
+        self.__size = size
+        self.__max_size = max_size
+
+    def record(self) -> File:
+        """Obtain `File` which doesn't refer to the spool."""
+        f = File(self._filename, self._prefixdir)
+        f._digest = self._digest
+        return f
+
+    def open(self) -> BinaryIO:
+        """Open the file to read in binary mode."""
+        return io.BytesIO(self.content())
+
+    def content(self) -> fr.Buffer:
+        """Obtain the content to pass to the readers in `font_reader`."""
+        if self.__size > self.__max_size:
+            return mmap.mmap(self.__spool.fileno(), 0,
+                             access=mmap.ACCESS_READ)
+        self.__spool.seek(0)
+        return self.__spool.read()
 
 
 class Source:
     """A Class to deal with the source archive."""
 
-    def __init__(self, fn: str, sourcedir: str = '.'):
-        """Initialize `Source` with source file."""
+    # Files larger than this are spooled to disk in streaming mode.
+    SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+    __slots__ = ('__sourcedir', '_sourcename', '_tempdir', '_zip', '_root',
+                 'ignore', '_is_archive', '_skipped', '_excluded', 'streaming',
+                 'excludepath', 'downloader', 'extract_cache',
+                 'spool_max_size', '_exclude', '__parsed', '__fullname')
+
+    def __init__(self, fn: str, sourcedir: str = '.', streaming: bool = False,
+                 excludepath: list[str] = [],
+                 downloader: Downloader = None,
+                 extract_cache: ExtractCache = None):
+        """Initialize `Source` with source file.
+
+        If `streaming` is True, members in archive are extracted one by one
+        and a file yielded by iter(self) is released when the next one is
+        requested. it is held in memory unless it is large.
+
+        Files in archive which isn't needed for packaging and fonts which
+        matches `excludepath` aren't extracted. they are still yielded but
+        not available on disk.
+
+        Remote files are downloaded with `downloader` if given.
+
+        If `extract_cache` is given, archives are extracted into it once
+        and the files are read from there later. `streaming` doesn't take
+        effect then.
+        """
         self.__sourcedir = sourcedir
         self._sourcename = fn
         self._tempdir = None
+        self._zip = None
         self._root = None
         self.ignore = False
         self._is_archive = False
+        self._skipped = [0, 0]
+        self._excluded = [0, 0]
+        self.streaming = streaming
+        self.excludepath = excludepath
+        self._exclude = None
+        self.downloader = downloader
+        self.extract_cache = extract_cache
+        self.spool_max_size = self.SPOOL_MAX_SIZE
+        self.__parsed = None
+        self.__fullname = None
 
     def __del__(self):
         """Cleanup a temporary directory where extracted source archive."""
+        self.cleanup()
+
+    def cleanup(self) -> None:
+        """Cleanup a temporary directory where extracted source archive.
+
+        Files yielded by iter(self) are available until this is called.
+        """
         if self._tempdir is not None:
             self._tempdir.cleanup()
+            self._tempdir = None
+        if self._zip is not None:
+            zipf, mm = self._zip
+            zipf.close()
+            if mm is not None:
+                try:
+                    mm.close()
+                except BufferError:
+                    # A content of ArchiveFile is still referenced.
+                    # this will be unmapped when it is released.
+                    pass
+            self._zip = None
 
     def __iter__(self) -> Iterator[File]:
         """Implement iter(self) with `File`."""
+        self.cleanup()
+        self._skipped = [0, 0]
+        self._excluded = [0, 0]
+        self._exclude = PathMatcher(self.excludepath)
         if not Path(self.fullname).exists():
             if self.is_downloadable:
-                with requests.get(self.url, stream=True) as r:
-                    r.raise_for_status()
-                    with open(self.fullname, 'wb') as f:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                self.download()
             else:
                 raise FileNotFoundError(
                     m([': ']).info(self.name).error('file not found'))
+        fmt = archive_format(self.fullname)
+        if fmt is not None and self.extract_cache is not None:
+            entry = self.__cached_tree(fmt)
+            if entry is not None:
+                self._is_archive = True
+                yield from self.__iter_tree(*entry)
+                return
+        if fmt == 'zip':
+            # Members are read from the archive directly.
+            self._is_archive = True
+            yield from self.__iter_zip()
+            return
         self._tempdir = tempfile.TemporaryDirectory()
+        if fmt in MEMBER_ITERATORS:
+            self._is_archive = True
+            if self.streaming:
+                yield from self.__iter_stream(fmt)
+            else:
+                yield from self.__iter_members(MEMBER_ITERATORS[fmt](
+                    self.fullname))
+            return
         try:
             shutil.unpack_archive(self.fullname, self._tempdir.name)
             self._is_archive = True
-            for root, dirs, files in os.walk(self._tempdir.name):
-                self._root = str(
-                    Path(
-                        *Path(root).relative_to(self._tempdir.name).parts[:1]))
-                for n in files:
-                    fn = str(Path(root).relative_to(self._tempdir.name) / n)
-                    yield File(fn, self._tempdir.name)
+            for fn, entry in scan_tree(self._tempdir.name):
+                self._root = str(Path(*Path(fn).parent.parts[:1]))
+                f = File(fn, self._tempdir.name)
+                if f.is_excluded(self._exclude):
+                    self.__skip(f, entry.stat(follow_symlinks=False).st_size)
+                    continue
+                yield f
         except shutil.ReadError:
             yield File(self.realname, self.__sourcedir, is_source=True)
+
+    def __iter_zip(self):
+        zipf = zipfile.ZipFile(self.fullname, 'r')
+        with open(self.fullname, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                mm = None
+        self._zip = (zipf, mm)
+        for info in zipf.infolist():
+            if info.is_dir():
+                continue
+            name = safe_name(info.filename)
+            self._root = str(Path(*Path(name).parent.parts[:1]))
+            f = ArchiveFile(name, str(self.fullname), zipf, info, mm)
+            if not f.is_needed(self._exclude):
+                # Nothing is read unless the content is requested.
+                self.__skip(f, info.file_size)
+            yield f
+
+    def __iter_members(self, members):
+        d = Path(self._tempdir.name)
+        # Links may come before the targets, e.g. the ones in conf.d in RPM.
+        # they are resolved after all the files are extracted.
+        links = []
+        for name, size, opener, link in members:
+            self._root = str(Path(*Path(name).parent.parts[:1]))
+            f = File(name, self._tempdir.name)
+            if not f.is_needed(self._exclude):
+                self.__skip(f, size)
+                yield f
+                continue
+            if link is not None:
+                links.append((name, link, f))
+            else:
+                (d / name).parent.mkdir(parents=True, exist_ok=True)
+                with opener() as i, (d / name).open(mode='wb') as o:
+                    f._digest = copy_hashed(i, o)
+                yield f
+        for name, link, f in links:
+            if not (d / link).is_file():
+                m([': ', ' ']).info(name).warning(
+                    'Unable to resolve a link. skipping').out()
+                continue
+            (d / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(d / link, d / name)
+            yield f
+
+    def __iter_stream(self, fmt):
+        # Links are yielded with the content of the targets while they are
+        # spooled. links to the files released already are resolved in
+        # another pass over the archive.
+        links = {}
+        later = {}
+        # Targets of the links resolved.
+        targets = {}
+        seen = set()
+        for name, size, opener, link in MEMBER_ITERATORS[fmt](self.fullname):
+            self._root = str(Path(*Path(name).parent.parts[:1]))
+            f = File(name, self._tempdir.name)
+            needed = f.is_needed(self._exclude)
+            if not needed:
+                self.__skip(f, size)
+                yield f
+            if link is not None:
+                if needed:
+                    link = targets.get(link, link)
+                    (later if link in seen else links).setdefault(
+                        link, []).append(name)
+                continue
+            seen.add(name)
+            names = ([name] if needed else []) + self.__aliases(
+                links.pop(name, []), links, targets, name)
+            if names:
+                yield from self.__spool(names, size, opener)
+        if later:
+            for name, size, opener, link in MEMBER_ITERATORS[fmt](
+                    self.fullname):
+                if link is None and name in later:
+                    yield from self.__spool(self.__aliases(
+                        later.pop(name), links, targets, name), size, opener)
+        for names in list(links.values()) + list(later.values()):
+            for name in names:
+                m([': ', ' ']).info(name).warning(
+                    'Unable to resolve a link. skipping').out()
+
+    def __aliases(self, names, links, targets, target):
+        # Links to the links are resolved as well.
+        retval = []
+        while names:
+            name = names.pop(0)
+            retval.append(name)
+            targets[name] = target
+            names += links.pop(name, [])
+        return retval
+
+    def __spool(self, names, size, opener):
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_max_size,
+                                           dir=self._tempdir.name) as spool:
+            with opener() as i:
+                digest = copy_hashed(i, spool)
+            for name in names:
+                sf = SpooledFile(name, self._tempdir.name, spool, size,
+                                 self.spool_max_size)
+                sf._digest = digest
+                yield sf
+
+    def __cached_tree(self, fmt):
+        digest = file_digest(self.fullname)
+        entry = self.extract_cache.get(digest)
+        if entry is None:
+            try:
+                with self.extract_cache.put(digest) as (d, members):
+                    self.__extract_all(fmt, d, members)
+            except shutil.ReadError:
+                # Not an archive.
+                return None
+            entry = self.extract_cache.get(digest)
+        return entry
+
+    def __extract_all(self, fmt, d, members):
+        # excludepath isn't applied here to share the tree between options.
+        d = Path(d)
+        if fmt == 'zip':
+            with zipfile.ZipFile(self.fullname, 'r') as zipf:
+                for info in zipf.infolist():
+                    if info.is_dir():
+                        continue
+                    name = safe_name(info.filename)
+                    needed = File(name, str(d)).is_needed()
+                    digest = None
+                    if needed:
+                        (d / name).parent.mkdir(parents=True, exist_ok=True)
+                        with zipf.open(info) as i, (d / name).open(
+                                mode='wb') as o:
+                            digest = copy_hashed(i, o)
+                    members.append([name, info.file_size, needed, digest])
+        elif fmt in MEMBER_ITERATORS:
+            # Same as `__iter_members`.
+            links = []
+            for name, size, opener, link in MEMBER_ITERATORS[fmt](
+                    self.fullname):
+                needed = File(name, str(d)).is_needed()
+                digest = None
+                if needed:
+                    if link is not None:
+                        links.append([name, size, link])
+                        continue
+                    (d / name).parent.mkdir(parents=True, exist_ok=True)
+                    with opener() as i, (d / name).open(mode='wb') as o:
+                        digest = copy_hashed(i, o)
+                members.append([name, size, needed, digest])
+            for name, size, link in links:
+                if not (d / link).is_file():
+                    m([': ', ' ']).info(name).warning(
+                        'Unable to resolve a link. skipping').out()
+                    continue
+                (d / name).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(d / link, d / name)
+                members.append([name, size, True, None])
         else:
-            if self._tempdir is not None:
-                self._tempdir.cleanup()
-                self._tempdir = None
+            shutil.unpack_archive(self.fullname, d)
+            for name, entry in scan_tree(str(d)):
+                size = entry.stat(follow_symlinks=False).st_size
+                members.append([name, size, True, None])
+
+    def __iter_tree(self, d, members):
+        for name, size, extracted, *digest in members:
+            self._root = str(Path(*Path(name).parent.parts[:1]))
+            f = File(name, d)
+            # Entries made by the older versions don't have the hash.
+            f._digest = digest[0] if digest else None
+            if not extracted or not f.is_needed(self._exclude):
+                self.__skip(f, size)
+            yield f
+
+    def __skip(self, f, size):
+        n = self._excluded if f.is_excluded(self._exclude) else self._skipped
+        n[0] += 1
+        n[1] += size
+
+    @property
+    def skipped(self) -> tuple[int, int]:
+        """Obtain the number of files and bytes not needed for packaging."""
+        return tuple(self._skipped)
+
+    @property
+    def excluded(self) -> tuple[int, int]:
+        """Obtain the number of fonts and bytes excluded by `excludepath`."""
+        return tuple(self._excluded)
 
     def __name(self, name):
         return Path(name).name
 
+    @property
+    def _parsed(self):
+        if self.__parsed is None:
+            self.__parsed = urlparse(self.realname, allow_fragments=True)
+        return self.__parsed
+
     @property
     def name(self) -> str:
         """Obtain filename."""
-        u = urlparse(self.realname, allow_fragments=True)
+        u = self._parsed
         if not u.scheme:
             return self.__name(self.realname)
         else:
@@ -444,26 +1055,26 @@ class Source:
     @property
     def url(self) -> str:
         """Obtain URL without querystring"""
-        u = urlparse(self.realname, allow_fragments=True)
-        return u._replace(query=None).geturl()
+        return self._parsed._replace(query=None).geturl()
 
     @property
     def querystring(self) -> str:
         """Obtain QueryString"""
-        u = urlparse(self.realname, allow_fragments=True)
-        return parse_qs(u.query)
+        return parse_qs(self._parsed.query)
 
     @property
-    def fullname(self) -> str:
+    def fullname(self) -> Path:
         """Obtain filename with fullpath."""
-        u = urlparse(self.realname, allow_fragments=True)
-        f = Path(self.__sourcedir) / (self.realname if not u.scheme else self.name)
-        if f.is_symlink():
-            sym = f.readlink()
-            if not sym.is_relative_to(self.__sourcedir):
-                # Symlink may points to the absolute path.
-                f = Path(self.__sourcedir) / sym.relative_to('/')
-        return f
+        if self.__fullname is None:
+            f = Path(self.__sourcedir) / (
+                self.realname if not self._parsed.scheme else self.name)
+            if f.is_symlink():
+                sym = f.readlink()
+                if not sym.is_relative_to(self.__sourcedir):
+                    # Symlink may points to the absolute path.
+                    f = Path(self.__sourcedir) / sym.relative_to('/')
+            self.__fullname = f
+        return self.__fullname
 
     @property
     def root(self) -> str:
@@ -477,20 +1088,35 @@ class Source:
     @property
     def is_downloadable(self) -> bool:
         """Whether a source is downloadable"""
-        u = urlparse(self.realname, allow_fragments=True)
-        if re.match(r'http.*', u.scheme):
+        if re.match(r'http.*', self._parsed.scheme):
             return True
         else:
             return False
 
+    def download(self) -> None:
+        """Download the source file."""
+        if self.downloader is not None:
+            self.downloader.fetch(self.url, self.fullname)
+        else:
+            download(self.url, self.fullname)
+
 
 class Sources:
     """Class to deal with source files."""
 
-    def __init__(self, arrays: list[str] = None, sourcedir: str = None):
+    def __init__(self, arrays: list[str] = None, sourcedir: str = None,
+                 streaming: bool = False, excludepath: list[str] = [],
+                 downloader: Downloader = None,
+                 extract_cache: ExtractCache = None):
         """Initialze `Sources` with the list of source files."""
         self._sources = []
         self.__sourcedir = sourcedir
+        self.__streaming = streaming
+        self.__excludepath = excludepath
+        self.__downloader = downloader
+        self.__extract_cache = extract_cache
+        self.__prefetcher = None
+        self.__pending = {}
         if arrays is not None:
             for e in arrays:
                 self.add(e)
@@ -499,7 +1125,11 @@ class Sources:
         """Add a source file and returns number of source files."""
         if sourcedir is None:
             sourcedir = self.__sourcedir
-        self._sources.append(Source(fn, sourcedir=sourcedir))
+        self._sources.append(Source(fn, sourcedir=sourcedir,
+                                    streaming=self.__streaming,
+                                    excludepath=self.__excludepath,
+                                    downloader=self.__downloader,
+                                    extract_cache=self.__extract_cache))
         return len(self._sources) - 1
 
     def get(self, idx: int) -> str:
@@ -512,8 +1142,124 @@ class Sources:
         return len(self._sources)
 
     def __iter__(self) -> Iterator[list[Source]]:
-        """Implement iter(self) for list of the source files."""
-        yield from self._sources
+        """Implement iter(self) for list of the source files.
+
+        This waits for the download of each in background if any.
+        """
+        try:
+            for s in self._sources:
+                future = self.__pending.pop(str(s.fullname), None)
+                if future is not None and future.exception() is None:
+                    m.release(future.result())
+                yield s
+        finally:
+            if self.__prefetcher is not None:
+                self.__prefetcher.shutdown(wait=False)
+                self.__prefetcher = None
+                self.__pending = {}
+
+    def prefetch(self, max_workers: int, max_per_host: int = MAX_PER_HOST,
+                 background: bool = False) -> None:
+        """Download remote source files not available yet concurrently.
+
+        Errors are ignored here. they are raised again when iterating
+        the source file. If `background` is True, this returns immediately
+        and iter(self) waits for the download of each source file.
+        """
+        tasks = {}
+        for s in self._sources:
+            if s.is_downloadable and not Path(s.fullname).exists():
+                tasks.setdefault(str(s.fullname), (s.url, s.download))
+        if background and tasks:
+            self.__prefetcher = Prefetcher(max_workers, max_per_host)
+            self.__pending = {fn: self.__prefetcher.submit(
+                url, lambda func=func: _held(func))
+                              for fn, (url, func) in tasks.items()}
+        elif len(tasks) > 1:
+            prefetch(list(tasks.values()), max_workers, max_per_host)
+
+
+def _read_faces(cache, content, digest=None):
+    # `content` is (archive, member) for the members in ZIP, to read them
+    # in the worker. the hash is computed from the content read here if
+    # not known yet, not to read it twice.
+    if isinstance(content, tuple):
+        with zipfile.ZipFile(content[0], 'r') as zipf:
+            content = zipf.read(content[1])
+    elif digest is None and not isinstance(content, fr.Buffer):
+        with open(content, 'rb') as f:
+            content = f.read()
+    if digest is None:
+        digest = file_digest(content)
+    if cache is None:
+        return digest, fr.faces_meta_reader(content)
+    return digest, cache.faces_meta_reader(content, digest)
+
+
+def _held(func):
+    # Messages are output when the result is used to keep the order.
+    with m.hold() as held:
+        func()
+    return held
+
+
+def iter_files(
+    sources: Sources, maxsize: int = UNPACK_QUEUE_SIZE
+) -> Iterator[tuple[Source, File | None]]:
+    """Iterate files in `sources`.
+
+    This yields a tuple of the source and a file in it, and the source and
+    None at the end of each source. Files are extracted in a background
+    thread up to `maxsize` files ahead, unless `maxsize` is 0. Messages
+    are output in the same order as iterating them in series.
+    """
+    if maxsize <= 0:
+        for source in sources:
+            for f in source:
+                yield source, f
+            yield source, None
+        return
+    q = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(held, *item):
+        messages = held[:]
+        held.clear()
+        while not stop.is_set():
+            try:
+                q.put((messages, *item), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        with m.hold() as held:
+            try:
+                for source in sources:
+                    for f in source:
+                        if not put(held, source, f, None):
+                            return
+                    if not put(held, source, None, None):
+                        return
+                put(held, None, None, None)
+            except BaseException as e:
+                put(held, None, None, e)
+
+    t = threading.Thread(target=produce, daemon=True)
+    t.start()
+    try:
+        while True:
+            messages, source, f, e = q.get()
+            m.release(messages)
+            if e is not None:
+                raise e
+            if source is None:
+                break
+            yield source, f
+    finally:
+        stop.set()
+        t.join()
 
 
 def params(func):
@@ -524,6 +1270,15 @@ def params(func):
         # Add default values for optional parameters.
         ('excludepath' not in kwargs or
          kwargs['excludepath'] is None) and kwargs.update({'excludepath': []})
+        'cache' not in kwargs and kwargs.update({'cache': True})
+        'cachedir' not in kwargs and kwargs.update({'cachedir': None})
+        ('jobs' not in kwargs or
+         kwargs['jobs'] is None) and kwargs.update({'jobs': 1})
+        'streaming' not in kwargs and kwargs.update({'streaming': False})
+        ('download_jobs' not in kwargs or kwargs['download_jobs'] is None
+         ) and kwargs.update({'download_jobs': 8})
+        'extract_cache' not in kwargs and kwargs.update(
+            {'extract_cache': False})
 
         return func(**kwargs)
 
@@ -533,7 +1288,25 @@ def params(func):
 @params
 def extract(name: str, version: str, sources: list[str], sourcedir: str,
             **kwargs: Any) -> dict[str, Any]:
-    """Extract source files and gather information."""
+    """Extract source files and gather information.
+
+    Currently following keyword arguments are supported:
+
+    'excludepath': list[str] (optional) - A list of exclusive paths
+                                          for sources.
+    'cache': bool (optional) - True to cache font metadata and downloaded
+                               files on disk.
+    'cachedir': str (optional) - Cache directory. XDG cache directory
+                                 will be used if not.
+    'jobs': int (optional) - Number of processes to read font metadata.
+                             This is ignored in streaming mode.
+    'streaming': bool (optional) - True to extract members in archive one
+                                   by one to reduce the disk usage.
+    'download_jobs': int (optional) - Number of remote source files to
+                                      download at once.
+    'extract_cache': bool (optional) - True to keep extracted archives in
+                                       the cache directory and reuse them.
+    """
     exdata = {
         'sources': [],
         'nsources': {},
@@ -543,52 +1316,132 @@ def extract(name: str, version: str, sources: list[str], sourcedir: str,
         'fontmap': {},
         'fonts': [],
         'fontinfo': {},
+        'duplicates': {},
         'archive': False
     }
-    sources = Sources(arrays=sources, sourcedir=sourcedir)
+    cache = MetadataCache(kwargs['cachedir']) if kwargs['cache'] else None
+    session = new_session()
+    downloader = DownloadCache(
+        kwargs['cachedir'],
+        session=session) if kwargs['cache'] else Downloader(session)
+    extract_cache = ExtractCache(
+        kwargs['cachedir']) if kwargs['extract_cache'] else None
+    sources = Sources(arrays=sources, sourcedir=sourcedir,
+                      streaming=kwargs['streaming'],
+                      excludepath=kwargs['excludepath'],
+                      downloader=downloader,
+                      extract_cache=extract_cache)
+    exclude = PathMatcher(kwargs['excludepath'])
     nsource = 20
-    exists = {}
-    for source in sources:
-        for sf in source:
-            if sf.is_license():
-                exdata['licenses'].append(sf)
-            elif sf.is_doc():
-                exdata['docs'].append(sf)
-            elif sf.is_fontconfig():
+    # The first file seen for each content.
+    digests = {}
+    # Files to read the metadata.
+    names = set()
+
+    def add_font(source, sf, digest):
+        # Returns True if the metadata of `sf` is needed.
+        source.ignore = not source.is_archive()
+        if digest in digests:
+            # Identical to the one seen. no need to install it
+            # twice nor to read the metadata again.
+            exdata['duplicates'].setdefault(
+                digest, [digests[digest]]).append(sf.name)
+            return False
+        digests[digest] = sf.name
+        exdata['fonts'].append(sf)
+        if sf.name in names:
+            m([': ', ' ']).info(sf.name).warning(
+                ('Duplicate font files detected. '
+                 'this may not works as expected')).out()
+            return False
+        names.add(sf.name)
+        return True
+
+    def add_fontinfo(name, faces):
+        for i, meta in enumerate(faces):
+            exdata['fontinfo'][(name, i)] = meta
+        exdata['foundry'] = faces[-1]['foundry']
+
+    # Files are gone before the pool reads them in streaming mode.
+    with ProcessPoolExecutor(max_workers=kwargs['jobs']) if kwargs[
+            'jobs'] > 1 and not kwargs[
+                'streaming'] else nullcontext() as executor:
+        if executor is not None:
+            # Start the workers before any threads to fork safely.
+            executor.submit(int).result()
+        # Downloads, extracting files and reading fonts run at once.
+        # everything is merged in the order of the sources and the files
+        # to get the same result as serial.
+        sources.prefetch(kwargs['download_jobs'], background=True)
+
+        def read_faces(*args):
+            if executor is not None:
+                return executor.submit(_read_faces, cache, *args)
+            future = Future()
+            future.set_result(_read_faces(cache, *args))
+            return future
+
+        pending = []
+        for source, sf in iter_files(sources, 0 if kwargs[
+                'streaming'] else UNPACK_QUEUE_SIZE):
+            if sf is None:
+                # Files not hashed yet are checked for duplicates here
+                # in the same order as serial.
+                for f, future, hashed in pending:
+                    digest, faces = future.result()
+                    f._digest = digest
+                    if hashed or add_font(source, f, digest):
+                        add_fontinfo(f.name, faces)
+                source.cleanup()
+                nfiles, nbytes = source.skipped
+                if nfiles > 0:
+                    m([': ', ' ']).info(source.name).message(
+                        ('Skipped {} files ({} bytes) not needed for '
+                         'packaging').format(nfiles, nbytes)).out()
+                nfiles, nbytes = source.excluded
+                if nfiles > 0:
+                    m([': ', ' ']).info(source.name).message(
+                        ('Excluded {} font files ({} bytes) by '
+                         '`excludepath`').format(nfiles, nbytes)).out()
+                if exdata['archive'] is True and source.is_archive():
+                    raise AttributeError(
+                        m().error('Multiple archives are not supported'))
+                exdata['archive'] = exdata['archive'] or source.is_archive()
+                if 'root' not in exdata:
+                    exdata['root'] = source.root if (
+                        source.root != '{}-{}'.format(name, version)) else ''
+                if not source.ignore and not source.is_archive():
+                    exdata['sources'].append(source.realname)
+                    exdata['nsources'][source.realname] = nsource
+                    nsource += 1
+                pending = []
+                continue
+            kind = sf.kind
+            if kind == 'license':
+                exdata['licenses'].append(sf.record())
+            elif kind == 'doc':
+                exdata['docs'].append(sf.record())
+            elif kind == 'fontconfig':
                 sf.family in exdata['fontconfig'] and m([': ', ' ']).info(
                     sf.family).warning('Duplicate family name').out()
-                exdata['fontconfig'][sf.family] = sf
+                exdata['fontconfig'][sf.family] = sf.record()
                 sf.has_family_map() and exdata['fontmap'].update(
                     sf.family_map())
                 source.ignore = not source.is_archive()
-            elif sf.is_font():
-                found = False
-                for ss in kwargs['excludepath']:
-                    if sf.name.startswith(ss):
-                        found = True
-                        break
-                if found:
+            elif kind == 'font':
+                if sf.is_excluded(exclude):
                     continue
-                exdata['fonts'].append(sf)
-                nm = Path(sf.name).name
-                if nm in exists:
-                    m([': ']).info(sf.name).warning(
-                        ('Possibly duplicate font files detected. '
-                         'Consider to use `excludepath` option.')).out()
-                    m().message(exists[nm]).out()
-                else:
-                    exists[nm] = []
-                exists[nm].append(sf.name)
-                if sf.name not in exdata['fontinfo']:
-                    exdata['fontinfo'][sf.name] = fr.font_meta_reader(
-                        sf.fullname)
-                    exdata['foundry'] = exdata['fontinfo'][sf.name]['foundry']
+                rec = sf.record()
+                if sf._digest is not None:
+                    # Hashed while extracting.
+                    if add_font(source, rec, sf._digest):
+                        pending.append((rec, read_faces(
+                            sf.content(), sf._digest), True))
+                elif isinstance(sf, ArchiveFile) and executor is not None:
+                    pending.append((rec, read_faces(sf.member), False))
                 else:
-                    m([': ', ' ']).info(sf.name).warning(
-                        ('Duplicate font files detected. '
-                         'this may not works as expected')).out()
-                source.ignore = not source.is_archive()
-            elif sf.is_appstream_file():
+                    pending.append((rec, read_faces(sf.content()), False))
+            elif kind == 'xml' and sf.is_appstream_file():
                 m([': ', ' ']).info(sf.name).warning(
                     ('AppStream file is no longer needed. '
                      'this will be generated by the macro automatically'
@@ -599,17 +1452,16 @@ def extract(name: str, version: str, sources: list[str], sourcedir: str,
                    ' ']).info(sf.name).warning('Unknown type of file').out()
                 source.ignore = not source.is_archive()
 
-        if exdata['archive'] is True and source.is_archive():
-            raise AttributeError(
-                m().error('Multiple archives are not supported'))
-        exdata['archive'] = exdata['archive'] or source.is_archive()
-        if 'root' not in exdata:
-            exdata['root'] = source.root if source.root != '{}-{}'.format(
-                name, version) else ''
-        if not source.ignore and not source.is_archive():
-            exdata['sources'].append(source.realname)
-            exdata['nsources'][source.realname] = nsource
-            nsource += 1
+    for names in exdata['duplicates'].values():
+        m([': ']).info(names[0]).warning(
+            'Identical font files detected. only the first one is used').out()
+        m().message(names[1:]).out()
+    if cache is not None:
+        cache.prune()
+    downloader.prune()
+    if extract_cache is not None:
+        extract_cache.prune()
+    session.close()
 
     return exdata
 
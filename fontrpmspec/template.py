@@ -18,25 +18,83 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Module to template a spec file."""
 
-from jinja2 import Environment, FileSystemLoader
+import threading
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from importlib.resources import files
+from pathlib import Path
 from typing import Any
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec.cache import default_cachedir
+from fontrpmspec.messages import Message as m
 
+TEMPLATES = {
+    'simple': 'spectemplate-fonts-simple.spec',
+    'multi': 'spectemplate-fonts-multi.spec',
+}
 
-def get(npkgs: int, data: dict[str, Any]) -> str:
-    """Generate a spec file from template."""
-    try:
-        ptempl = files('fontrpmspec.template').name()
-    except TypeError:
-        ptempl = files('fontrpmspec').joinpath('template')
-    env = Environment(loader=FileSystemLoader(ptempl))
+_environment = None
+_cache_failed = False
+_lock = threading.Lock()
+
+
+def environment(cache: bool = False, cachedir: str = None) -> Environment:
+    """Get the Jinja environment shared in this process.
+
+    Templates are compiled once and kept in it. If `cache` is True,
+    compiled templates are also stored on disk under `cachedir` to be
+    reused by other processes. the directory given first is used then.
+    templates are compiled in memory only if it isn't writable.
+    """
+    global _environment, _cache_failed
+    with _lock:
+        if _environment is None:
+            try:
+                ptempl = files('fontrpmspec.template').name()
+            except TypeError:
+                ptempl = files('fontrpmspec').joinpath('template')
+            # Templates are never updated while running.
+            _environment = Environment(loader=FileSystemLoader(ptempl),
+                                       auto_reload=False)
+        if cache and _environment.bytecode_cache is None and (
+                not _cache_failed):
+            d = (Path(cachedir)
+                 if cachedir is not None else default_cachedir()) / 'template'
+            try:
+                d.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                m([': ']).info(d).warning(
+                    'Unable to update cache').message(e).out()
+                _cache_failed = True
+            else:
+                _environment.bytecode_cache = FileSystemBytecodeCache(str(d))
+        return _environment
+
+
+def prewarm(cache: bool = False, cachedir: str = None) -> None:
+    """Compile all the templates in advance.
+
+    `cache` and `cachedir` are same as `environment`.
+    """
+    env = environment(cache, cachedir)
+    for fn in TEMPLATES.values():
+        env.get_template(fn)
+
+
+def get(npkgs: int, data: dict[str, Any], cache: bool = False,
+        cachedir: str = None) -> str:
+    """Generate a spec file from template.
+
+    `cache` and `cachedir` are same as `environment`.
+    """
+    env = environment(cache, cachedir)
     template = {}
 
     if npkgs == 1:
-        template['spec'] = env.get_template(
-            'spectemplate-fonts-simple.spec').render(data)
+        template['spec'] = env.get_template(TEMPLATES['simple']).render(data)
     else:
-        template['spec'] = env.get_template(
-            'spectemplate-fonts-multi.spec').render(data)
+        template['spec'] = env.get_template(TEMPLATES['multi']).render(data)
 
     return template
@@ -0,0 +1,106 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Unit test for batch.py."""
+
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import batch
+from fontrpmspec.messages import Message
+
+
+def build_font(fn: str, family: str) -> None:
+    """Build a small TrueType font."""
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(['.notdef'])
+    fb.setupCharacterMap({})
+    pen = TTGlyphPen(None)
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 500))
+    pen.lineTo((500, 0))
+    pen.closePath()
+    fb.setupGlyf({'.notdef': pen.glyph()})
+    fb.setupHorizontalMetrics({'.notdef': (600, 0)})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': family, 'styleName': 'Regular'})
+    fb.setupOS2(sFamilyClass=8 << 8, achVendID='ADBO')
+    fb.setupPost()
+    fb.save(fn)
+
+
+class TestBatch(unittest.TestCase):
+    """Test case for batch generation."""
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name)
+        build_font(str(self.path / 'foo.ttf'), 'Foo')
+        with zipfile.ZipFile(self.path / 'foo-1.0.zip', 'w') as z:
+            z.write(self.path / 'foo.ttf', 'foo-1.0/Foo-Regular.ttf')
+            z.writestr('foo-1.0/OFL.txt', 'license')
+        (self.path / 'OFL.txt').write_text('license')
+        common = {'URL': 'https://example.com', 'username': 'Foo',
+                  'email': 'foo@example.com'}
+        self.entries = [
+            dict(common, NAME='foo', sources=['foo-1.0.zip'],
+                 url='https://example.com/{name}', name='x', version='2'),
+            dict(common, NAME='bar', source='bar-2.0.zip'),
+            dict(common, NAME='baz', VERSION='1.0',
+                 sources=['foo.ttf', 'OFL.txt'], license='MIT'),
+            {'NAME': 'broken'},
+            dict(common, NAME='../foo', sources=['foo-1.0.zip']),
+        ]
+        self.kwargs = {'sourcedir': self.tmpdir.name, 'cache': False}
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_load_manifest(self):
+        """Test for loading a manifest."""
+        fn = self.path / 'manifest.jsonl'
+        fn.write_text('\n'.join(json.dumps(e) for e in self.entries) + '\n\n')
+        self.assertEqual(batch.load_manifest(str(fn)), self.entries)
+        fn.write_text('{"NAME": "foo"}\n[]\n')
+        with self.assertRaises(ValueError):
+            batch.load_manifest(str(fn))
+
+    def test_run(self):
+        """Test for generating files for packages."""
+        outputs = []
+        for jobs in [1, 2]:
+            outputdir = self.path / 'out{}'.format(jobs)
+            with Message.hold() as held:
+                results = list(batch.run(self.entries, str(outputdir), jobs,
+                                         **self.kwargs))
+            self.assertEqual([r['name'] for r in results],
+                             ['foo', 'bar', 'baz', 'broken', '../foo'])
+            self.assertEqual([r['error'] is None for r in results],
+                             [True, False, True, False, False])
+            self.assertIn('FileNotFoundError', results[1]['error'])
+            self.assertIn('Invalid NAME', results[4]['error'])
+            files = {str(p.relative_to(outputdir)): p.read_text()
+                     for p in outputdir.rglob('*') if p.is_file()}
+            self.assertFalse((self.path / 'foo').exists())
+            self.assertEqual(sorted(files), [
+                'baz/69-adobe-foo-fonts.conf', 'baz/baz.spec',
+                'foo/69-adobe-foo-fonts.conf', 'foo/foo.spec'])
+            self.assertRegex(files['foo/foo.spec'], r'Version:\s+1\.0')
+            self.assertRegex(files['baz/baz.spec'], r'fontlicense\s+MIT')
+            outputs.append((files, [x.replace(str(outputdir), '')
+                                    for x in held]))
+        # Messages come in the same order with the pool.
+        self.assertEqual(outputs[0], outputs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Benchmark for classifying files in sources.
+
+Run this from the top directory:
+  PYTHONPATH=. python3 tests/bench_classify.py [NFILES]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import sources as src
+
+
+def old_name(realname):
+    """Reproduce the former File.name for members in archive."""
+    u = urlparse(realname, allow_fragments=True)
+    if u.scheme:
+        return Path(u.path).name
+    p = Path(realname)
+    d = p.parent
+    if not d.parts[1:]:
+        return str(d / p.name) if d == '.' else p.name
+    return str(d.relative_to(*d.parts[:1]) / p.name)
+
+
+def old_kind(realname):
+    """Reproduce the former chain of is_* in extract."""
+    LICENSES = ['OFL', 'MIT', 'GPL']
+    if re.search(r'(?i:license|notice)', old_name(realname)) or re.search(
+            re.compile('|'.join(LICENSES)), old_name(realname)):
+        return 'license'
+    if re.search(r'(?i:readme|news.*)', old_name(realname)) or (
+            old_name(realname).endswith('.txt')
+            and old_name(realname) != 'requirements.txt'):
+        return 'doc'
+    if re.search(r'(?i:fontconfig)', old_name(realname)) or old_name(
+            realname).endswith('.conf'):
+        return 'fontconfig'
+    if old_name(realname).endswith(('.otf', '.otc', '.ttf', '.ttc', '.pcf',
+                                    '.pcf.gz')):
+        return 'font'
+    if old_name(realname).endswith('.xml'):
+        return 'xml'
+    return None
+
+
+def build_names(nfiles: int) -> list[str]:
+    """Build a synthetic listing of `nfiles` members in archive."""
+    names = ['OFL.txt', 'README.md', 'NEWS', 'requirements.txt',
+             'fontconfig/65-{}.conf', 'ttf/Bench{}-Regular.ttf',
+             'otf/Bench{}-Bold.otf', 'misc/bench{}.pcf.gz',
+             'src/glyphs/uni{:04X}.glif', 'docs/specimen{}.png',
+             'metainfo/bench{}.metainfo.xml', 'tools/build{}.py']
+    return ['bench-1.0/' + names[i % len(names)].format(i)
+            for i in range(nfiles)]
+
+
+def main():
+    """Endpoint function to run the benchmark."""
+    nfiles = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    names = build_names(nfiles)
+    print('{} files'.format(nfiles))
+    results = {}
+    for label, func in (('before', old_kind),
+                        ('after', lambda n: src.File(n, '.').kind)):
+        start = time.perf_counter()
+        results[label] = [func(n) for n in names]
+        elapsed = time.perf_counter() - start
+        print('{:>6}: {:8.1f} ms'.format(label, elapsed * 1000))
+    print('same result: {}'.format(results['before'] == results['after']))
+
+
+if __name__ == '__main__':
+    main()
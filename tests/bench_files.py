@@ -0,0 +1,53 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Benchmark for the memory and the time of sources.File.
+
+Run this from the top directory:
+  PYTHONPATH=. python3 tests/bench_files.py [NFILES]
+"""
+
+import sys
+import time
+import tracemalloc
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import sources as src
+from bench_classify import build_names
+
+
+def touch(files):
+    """Access properties many times per file as extract does."""
+    for i in range(5):
+        for f in files:
+            f.name
+            f.fullname
+            f.kind
+
+
+def main():
+    """Endpoint function to run the benchmark."""
+    nfiles = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    names = build_names(nfiles)
+    print('{} files'.format(nfiles))
+    start = time.perf_counter()
+    files = [src.File(n, '/nonexistent') for n in names]
+    print('  create: {:8.1f} ms'.format((time.perf_counter() - start) * 1000))
+    start = time.perf_counter()
+    touch(files)
+    print('  access: {:8.1f} ms'.format((time.perf_counter() - start) * 1000))
+    del files
+    tracemalloc.start()
+    files = [src.File(n, '/nonexistent') for n in names]
+    for f in files:
+        f.name
+        f.fullname
+        f.kind
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('  memory: {:8.1f} MiB'.format(size / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
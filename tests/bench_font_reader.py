@@ -0,0 +1,124 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Benchmark for font_reader.font_meta_reader.
+
+Run this from the top directory:
+  PYTHONPATH=. python3 tests/bench_font_reader.py [NGLYPHS] [NRUNS]
+"""
+
+import builtins
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import font_reader as fr
+
+
+class CountingFile(io.FileIO):
+    """File object to count bytes read."""
+
+    nread = 0
+
+    def read(self, size=-1):
+        """Read data and account the size of it."""
+        data = super().read(size)
+        CountingFile.nread += len(data)
+        return data
+
+    def readinto(self, b):
+        """Read data into `b` and account the size of it."""
+        n = super().readinto(b)
+        CountingFile.nread += n or 0
+        return n
+
+
+def build_font(fn: str, nglyphs: int = 20000) -> None:
+    """Build a synthetic TrueType font with `nglyphs` glyphs."""
+    names = ['.notdef'] + ['g{}'.format(i) for i in range(1, nglyphs)]
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(names)
+    fb.setupCharacterMap({0x4e00 + i: n for i, n in enumerate(names[1:])})
+    glyphs = {}
+    for i, n in enumerate(names):
+        pen = TTGlyphPen(None)
+        pen.moveTo((0, 0))
+        pen.lineTo((0, 100 + i % 500))
+        pen.lineTo((500, 100 + i % 500))
+        pen.lineTo((500, 0))
+        pen.closePath()
+        glyphs[n] = pen.glyph()
+    fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics({n: (600, 0) for n in names})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': 'Bench Sans', 'styleName': 'Regular'})
+    fb.setupOS2(sFamilyClass=8 << 8, achVendID='TEST')
+    fb.setupPost()
+    fb.save(fn)
+
+
+def old_font_meta_reader(fontfile, font_number=0):
+    """Reproduce the table access pattern of the former implementation."""
+    font = TTFont(fontfile, fontNumber=font_number)
+    for fmd in font['name'].names:
+        fmd.toStr()
+    font['OS/2'].achVendID
+    font['head'].fontRevision
+    # FontClass used to open the file once more.
+    tt = TTFont(fontfile, fontNumber=font_number)
+    tt['OS/2'].panose
+    'prep' in font or 'fpgm' in font
+    'fvar' in font and 'gvar' in font
+
+
+def fonttools_font_meta_reader(fontfile, font_number=0):
+    """Read metadata through fontTools only."""
+    with TTFont(fontfile, fontNumber=font_number, lazy=True) as font:
+        fr._read_meta(font, fontfile, font_number)
+
+
+def main():
+    """Endpoint function to run the benchmark."""
+    nglyphs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    nruns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fn = str(Path(tmpdir) / 'bench.ttf')
+        build_font(fn, nglyphs)
+        size = Path(fn).stat().st_size
+        print('font size: {} bytes, {} glyphs, {} runs'.format(
+            size, nglyphs, nruns))
+        orig_open = builtins.open
+
+        def counting_open(file, mode='r', *args, **kwargs):
+            if file == fn and 'b' in mode and 'w' not in mode:
+                return CountingFile(file)
+            return orig_open(file, mode, *args, **kwargs)
+
+        builtins.open = counting_open
+        try:
+            # Pages touched through mmap aren't accounted as bytes read.
+            for label, func in (('before', old_font_meta_reader),
+                                ('lazy', fonttools_font_meta_reader),
+                                ('mmap', fr.font_meta_reader)):
+                CountingFile.nread = 0
+                start = time.perf_counter()
+                for i in range(nruns):
+                    func(fn, 0)
+                elapsed = time.perf_counter() - start
+                print(('{:>6}: {:>10.0f} bytes read/face, '
+                       '{:8.3f} ms/face').format(
+                           label, CountingFile.nread / nruns,
+                           elapsed * 1000 / nruns))
+        finally:
+            builtins.open = orig_open
+
+
+if __name__ == '__main__':
+    main()
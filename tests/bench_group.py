@@ -0,0 +1,70 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Benchmark for font_reader.group.
+
+Run this from the top directory:
+  PYTHONPATH=. python3 tests/bench_group.py [NFACES] [NFAMILIES]
+"""
+
+import re
+import sys
+import time
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import font_reader as fr
+
+
+def old_group(families):
+    """Reproduce the former implementation."""
+    retval = {}
+    x = sorted(families.items(), key=lambda x: len(x[1]['family']))
+    for k, v in x:
+        found = False
+        family = v['family'] if not v['variable'] else v['family'] + ' VF'
+        for f in retval.keys():
+            if re.fullmatch(r'{}'.format(f), family):
+                retval[family].append({'fontinfo': v, 'file': k})
+                found = True
+        if not found:
+            retval[family] = [{'fontinfo': v, 'file': k}]
+    return retval
+
+
+def build_families(nfaces: int, nfamilies: int) -> dict[str, dict]:
+    """Build synthetic metadata for `nfaces` faces in `nfamilies` families."""
+    styles = ['Regular', 'Bold', 'Italic', 'Bold Italic', 'Light', 'Medium']
+    retval = {}
+    for i in range(nfaces):
+        fam = i % nfamilies
+        family = 'Bench {} Sans'.format(fam) if fam % 3 else 'Bench {}'.format(
+            fam)
+        retval['bench{}-{}.ttf'.format(fam, i)] = {
+            'family': family,
+            'SubFamily': styles[i % len(styles)],
+            'variable': fam % 7 == 0 and i % 2 == 0,
+        }
+    return retval
+
+
+def main():
+    """Endpoint function to run the benchmark."""
+    nfaces = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    nfamilies = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    families = build_families(nfaces, nfamilies)
+    print('{} faces, {} families'.format(nfaces, nfamilies))
+    results = {}
+    for label, func in (('before', old_group), ('after', fr.group)):
+        start = time.perf_counter()
+        results[label] = func(families)
+        elapsed = time.perf_counter() - start
+        print('{:>6}: {:8.1f} ms'.format(label, elapsed * 1000))
+    same = all([x['file'] for x in results['before'][k]]
+               == [x['file'] for x in v] for k, v in results['after'].items())
+    print('same grouping: {}'.format(
+        same and list(results['before']) == list(results['after'])))
+
+
+if __name__ == '__main__':
+    main()
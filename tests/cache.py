@@ -0,0 +1,96 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Unit test for cache.py."""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec.cache import ExtractCache, MetadataCache
+
+
+class TestMetadataCache(unittest.TestCase):
+    """Test case for MetadataCache class."""
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = MetadataCache(self.tmpdir.name)
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        """Test for get and put."""
+        faces = [{'family': 'Foo', 'font_revision': 1.5, 'alias': ['serif'],
+                  'hashint': False, False: 'bar'}]
+        self.assertIsNone(self.cache.get('00ff'))
+        self.cache.put('00ff', faces)
+        self.assertEqual(self.cache.get('00ff'), faces)
+
+    def test_prune(self):
+        """Test for prune."""
+        self.cache.max_size = 150
+        for i, digest in enumerate(['0a', '0b', '0c']):
+            self.cache.put(digest, [{'family': 'x' * 50}])
+            for p in Path(self.cache.path).rglob(digest + '.json'):
+                os.utime(p, (i, i))
+        self.cache.get('0a')
+        self.cache.prune()
+        self.assertIsNotNone(self.cache.get('0a'))
+        self.assertIsNone(self.cache.get('0b'))
+        self.assertIsNotNone(self.cache.get('0c'))
+
+
+class TestExtractCache(unittest.TestCase):
+    """Test case for ExtractCache class."""
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ExtractCache(self.tmpdir.name)
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        """Test for get and put."""
+        self.assertIsNone(self.cache.get('00ff'))
+        with self.assertRaises(RuntimeError):
+            with self.cache.put('00ff') as (d, members):
+                raise RuntimeError
+        self.assertIsNone(self.cache.get('00ff'))
+        with self.cache.put('00ff') as (d, members):
+            (Path(d) / 'foo').mkdir()
+            (Path(d) / 'foo' / 'foo.ttf').write_bytes(b'foo')
+            members.append(['foo/foo.ttf', 3, True])
+        d, members = self.cache.get('00ff')
+        self.assertEqual(members, [['foo/foo.ttf', 3, True]])
+        self.assertEqual((Path(d) / 'foo' / 'foo.ttf').read_bytes(), b'foo')
+        self.assertEqual(
+            (Path(d) / 'foo' / 'foo.ttf').stat().st_mode & 0o222, 0)
+        self.assertEqual(len(list(self.cache.path.glob('*/*'))), 1)
+
+    def test_prune(self):
+        """Test for prune."""
+        self.cache.max_size = 250
+        for i, digest in enumerate(['0a', '0b', '0c']):
+            with self.cache.put(digest) as (d, members):
+                (Path(d) / 'foo.ttf').write_bytes(b'\0' * 100)
+            d, members = self.cache.get(digest)
+            os.utime(Path(d).parent, (i, i))
+        self.cache.get('0a')
+        self.cache.prune()
+        self.assertIsNotNone(self.cache.get('0a'))
+        self.assertIsNone(self.cache.get('0b'))
+        self.assertIsNotNone(self.cache.get('0c'))
+
+
+if __name__ == '__main__':
+    unittest.main()
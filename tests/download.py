@@ -0,0 +1,250 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Unit test for download.py."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec.download import DownloadCache, download, prefetch
+from fontrpmspec.messages import Message
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Request handler which supports ETag and Range."""
+
+    content = b''
+    etag = '"1"'
+    # Send only this many bytes for the next request to simulate an error.
+    truncate = None
+    log = []
+    # Seconds to wait before responding and the number of requests handled
+    # at once.
+    delay = 0
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        """Handle GET request."""
+        cls = type(self)
+        cls.log.append(dict(self.headers))
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(cls.delay)
+        with cls.lock:
+            cls.active -= 1
+        if self.headers.get('If-None-Match') == cls.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        rng = self.headers.get('Range')
+        if rng and self.headers.get('If-Range') == cls.etag:
+            start = int(rng[len('bytes='):].rstrip('-'))
+            if start >= len(cls.content):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+                start, len(cls.content) - 1, len(cls.content)))
+        else:
+            self.send_response(200)
+        self.send_header('ETag', cls.etag)
+        self.send_header('Content-Length', str(len(cls.content) - start))
+        self.end_headers()
+        data = cls.content[start:]
+        if cls.truncate is not None:
+            data = data[:cls.truncate]
+            cls.truncate = None
+            self.close_connection = True
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        """Suppress logs."""
+        pass
+
+
+class TestDownloadCache(unittest.TestCase):
+    """Test case for DownloadCache class."""
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name)
+        Handler.content = bytes(range(256)) * 4096
+        Handler.etag = '"1"'
+        Handler.truncate = None
+        Handler.log = []
+        Handler.delay = 0
+        Handler.peak = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}/foo.zip'.format(
+            self.server.server_address[1])
+        self.cache = DownloadCache(self.tmpdir.name)
+
+    def tearDown(self):
+        """Stop the server and clean up a temporary directory."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmpdir.cleanup()
+
+    def test_download(self):
+        """Test for download without caches."""
+        download(self.url, self.path / 'a' / 'foo.zip')
+        self.assertEqual((self.path / 'a' / 'foo.zip').read_bytes(),
+                         Handler.content)
+        self.assertEqual(list((self.path / 'a').iterdir()),
+                         [self.path / 'a' / 'foo.zip'])
+
+    def test_revalidate(self):
+        """Test for revalidation with ETag."""
+        self.cache.fetch(self.url, self.path / 'a' / 'foo.zip')
+        self.cache.fetch(self.url, self.path / 'b' / 'foo.zip')
+        self.assertEqual(Handler.log[1].get('If-None-Match'), '"1"')
+        self.assertEqual((self.path / 'b' / 'foo.zip').read_bytes(),
+                         Handler.content)
+        Handler.content = b'updated'
+        Handler.etag = '"2"'
+        self.cache.fetch(self.url, self.path / 'c' / 'foo.zip')
+        self.assertEqual((self.path / 'c' / 'foo.zip').read_bytes(),
+                         b'updated')
+
+    def test_resume(self):
+        """Test for resuming an interrupted download."""
+        Handler.truncate = 100000
+        with self.assertRaises(Exception):
+            self.cache.fetch(self.url, self.path / 'foo.zip')
+        self.assertFalse((self.path / 'foo.zip').exists())
+        self.cache.fetch(self.url, self.path / 'foo.zip')
+        # Resumed from the last chunk received completely.
+        self.assertEqual(Handler.log[1].get('Range'), 'bytes=65536-')
+        self.assertEqual((self.path / 'foo.zip').read_bytes(),
+                         Handler.content)
+        # The content is changed on the server in the meantime.
+        Handler.truncate = 100000
+        Handler.etag = '"2"'
+        with self.assertRaises(Exception):
+            self.cache.fetch(self.url, self.path / 'bar.zip')
+        Handler.content = Handler.content[::-1]
+        Handler.etag = '"3"'
+        self.cache.fetch(self.url, self.path / 'bar.zip')
+        self.assertEqual(Handler.log[-1].get('If-Range'), '"2"')
+        self.assertEqual((self.path / 'bar.zip').read_bytes(),
+                         Handler.content)
+
+    def test_range_not_satisfiable(self):
+        """Test for the partial file which doesn't fit the remote file."""
+        Handler.truncate = 100000
+        with self.assertRaises(Exception):
+            self.cache.fetch(self.url, self.path / 'foo.zip')
+        Handler.content = Handler.content[:1000]
+        self.cache.fetch(self.url, self.path / 'foo.zip')
+        self.assertEqual(Handler.log[1].get('Range'), 'bytes=65536-')
+        self.assertEqual(Handler.log[2].get('Range'), None)
+        self.assertEqual((self.path / 'foo.zip').read_bytes(),
+                         Handler.content)
+
+    def test_concurrent(self):
+        """Test for fetching the same URL at once."""
+        Handler.delay = 0.2
+        threads = [threading.Thread(target=self.cache.fetch, args=(
+            self.url, self.path / str(i))) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(Handler.peak, 1)
+        self.assertEqual([h.get('If-None-Match') for h in Handler.log],
+                         [None, '"1"', '"1"'])
+        for i in range(3):
+            self.assertEqual((self.path / str(i)).read_bytes(),
+                             Handler.content)
+        self.assertEqual(list((self.cache.path / 'partial').iterdir()), [])
+
+    def test_prune(self):
+        """Test for prune."""
+        self.cache.max_size = 10
+        self.cache.fetch(self.url, self.path / 'foo.zip')
+        Handler.truncate = 100000
+        Handler.etag = '"2"'
+        with self.assertRaises(Exception):
+            self.cache.fetch(self.url + '?1', self.path / 'bar.zip')
+        Handler.etag = '"1"'
+        part = next((self.cache.path / 'partial').iterdir())
+        self.cache.prune()
+        self.assertTrue(part.exists())
+        os.utime(part, (0, 0))
+        self.cache.prune()
+        self.assertFalse(part.exists())
+        self.assertFalse(any(p.is_file() for p in
+                             (self.cache.path / 'objects').rglob('*')))
+        self.cache.fetch(self.url, self.path / 'baz.zip')
+        self.assertEqual(Handler.log[-1].get('If-None-Match'), None)
+        self.assertEqual((self.path / 'baz.zip').read_bytes(),
+                         Handler.content)
+
+    def test_place(self):
+        """Test for placing the cached file by hard link."""
+        self.cache.fetch(self.url, self.path / 'a' / 'foo.zip')
+        self.cache.fetch(self.url, self.path / 'a' / 'foo.zip')
+        obj = next(p for p in (self.cache.path / 'objects').rglob('*')
+                   if p.is_file())
+        self.assertTrue(os.path.samefile(obj, self.path / 'a' / 'foo.zip'))
+        self.assertEqual(list((self.path / 'a').iterdir()),
+                         [self.path / 'a' / 'foo.zip'])
+
+    def test_unusable_cache(self):
+        """Test for the cache directory which can't be written."""
+        (self.path / 'file').write_text('')
+        cache = DownloadCache(str(self.path / 'file'))
+        with Message.hold() as held:
+            cache.fetch(self.url, self.path / 'a' / 'foo.zip')
+            cache.fetch(self.url, self.path / 'b' / 'foo.zip')
+        self.assertEqual(len(held), 1)
+        self.assertIn('Unable to update cache', held[0])
+        # Only the objects can't be stored.
+        cache = DownloadCache(str(self.path / 'c'))
+        (cache.path / 'objects').parent.mkdir(parents=True)
+        (cache.path / 'objects').write_text('')
+        with Message.hold() as held:
+            cache.fetch(self.url, self.path / 'c' / 'foo.zip')
+        self.assertIn('Unable to update cache', held[0])
+        for d in ['a', 'b', 'c']:
+            self.assertEqual((self.path / d / 'foo.zip').read_bytes(),
+                             Handler.content)
+
+    def test_prefetch(self):
+        """Test for prefetch."""
+        Handler.delay = 0.2
+        tasks = [(self.url, lambda i=i: self.cache.fetch(
+            self.url + '?{}'.format(i), self.path / str(i)))
+                 for i in range(6)]
+        # Nothing listens on the port 1.
+        tasks.append(('http://127.0.0.1:1/foo.zip', lambda: download(
+            'http://127.0.0.1:1/foo.zip', self.path / 'x')))
+        start = time.monotonic()
+        errors = prefetch(tasks, max_workers=8, max_per_host=3)
+        self.assertLess(time.monotonic() - start, 6 * 0.2)
+        self.assertEqual(Handler.peak, 3)
+        self.assertEqual(len(errors), 1)
+        for i in range(6):
+            self.assertEqual((self.path / str(i)).read_bytes(),
+                             Handler.content)
+
+
+if __name__ == '__main__':
+    unittest.main()
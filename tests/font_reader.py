@@ -0,0 +1,233 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Unit test for font_reader.py."""
+
+import array
+import gzip
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont, TTCollection, newTable
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import font_reader as fr
+
+
+def build_font(fn: str, family: str, family_class: int = 8 << 8,
+               variable: bool = False) -> None:
+    """Build a small TrueType font."""
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(['.notdef', 'A'])
+    fb.setupCharacterMap({0x41: 'A'})
+    glyphs = {}
+    for n in ['.notdef', 'A']:
+        pen = TTGlyphPen(None)
+        pen.moveTo((0, 0))
+        pen.lineTo((0, 500))
+        pen.lineTo((500, 0))
+        pen.closePath()
+        glyphs[n] = pen.glyph()
+    fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics({'.notdef': (600, 0), 'A': (600, 0)})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': family, 'styleName': 'Regular'})
+    fb.setupOS2(sFamilyClass=family_class, achVendID='ADBO')
+    fb.setupPost()
+    if variable:
+        fb.setupFvar([('wght', 100, 400, 900, 'Weight')], [])
+    fb.save(fn)
+
+
+def build_pcf(fn: str, props: dict[str, str | int], msb: bool = False) -> None:
+    """Build a PCF font which has the properties table and a dummy table."""
+    bo = '>' if msb else '<'
+    strings = b''
+    entries = b''
+    for k, v in props.items():
+        entries += struct.pack(bo + 'lbl', len(strings), isinstance(v, str),
+                               len(strings) + len(k) + 1 if isinstance(
+                                   v, str) else v)
+        strings += k.encode('latin-1') + b'\0'
+        if isinstance(v, str):
+            strings += v.encode('latin-1') + b'\0'
+    table = struct.pack('<l', 4 if msb else 0) + struct.pack(
+        bo + 'l', len(props)) + entries + b'\0' * ((4 - len(props) % 4) % 4)
+    table += struct.pack(bo + 'l', len(strings)) + strings
+    table += b'\0' * ((4 - len(table) % 4) % 4)
+    dummy = b'\0' * 1024
+    data = b'\x01fcp' + struct.pack('<l', 2)
+    data += struct.pack('<4l', 1 << 2, 0, len(dummy), 8 + 32)
+    data += struct.pack('<4l', 1, 0, len(table), 8 + 32 + len(dummy))
+    data += dummy + table
+    with (gzip.open if fn.endswith('.gz') else open)(fn, 'wb') as f:
+        f.write(data)
+
+
+class TestFontMetaReader(unittest.TestCase):
+    """Test case for font_meta_reader."""
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ttf = str(Path(self.tmpdir.name) / 'foo.ttf')
+        self.serif = str(Path(self.tmpdir.name) / 'bar.ttf')
+        self.ttc = str(Path(self.tmpdir.name) / 'foo.ttc')
+        self.woff = str(Path(self.tmpdir.name) / 'foo.woff')
+        build_font(self.ttf, 'Foo Sans')
+        build_font(self.serif, 'Bar Serif', 1 << 8)
+        c = TTCollection()
+        c.fonts = [TTFont(self.ttf), TTFont(self.serif)]
+        c.save(self.ttc)
+        f = TTFont(self.ttf)
+        f.flavor = 'woff'
+        f.save(self.woff)
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        self.tmpdir.cleanup()
+
+    def fonttools_meta(self, fn, idx=0):
+        """Read metadata through fontTools only."""
+        with TTFont(fn, fontNumber=idx, lazy=True) as font:
+            return fr._read_meta(font, fn, idx)
+
+    def test_fast_path(self):
+        """Test the result of the fast path is same as fontTools."""
+        meta = fr.font_meta_reader(self.ttf)
+        self.assertEqual(meta, self.fonttools_meta(self.ttf))
+        self.assertEqual(meta['family'], 'Foo Sans')
+        self.assertEqual(meta['foundry'], 'adobe')
+        self.assertEqual(meta['alias'], ['sans-serif'])
+        self.assertEqual(meta['type'], 'TrueType')
+
+    def test_hashint(self):
+        """Test for fonts which has hinting instructions."""
+        self.assertFalse(fr.font_meta_reader(self.ttf)['hashint'])
+        fn = str(Path(self.tmpdir.name) / 'hinted.ttf')
+        f = TTFont(self.ttf)
+        f['cvt '] = newTable('cvt ')
+        f['cvt '].values = array.array('h', [0])
+        f.save(fn)
+        meta = fr.font_meta_reader(fn)
+        self.assertTrue(meta['hashint'])
+        self.assertEqual(meta, self.fonttools_meta(fn))
+
+    def test_collection(self):
+        """Test for faces in a font collection."""
+        for i in range(2):
+            self.assertEqual(fr.font_meta_reader(self.ttc, i),
+                             self.fonttools_meta(self.ttc, i))
+        self.assertEqual(fr.font_meta_reader(self.ttc, 1)['alias'], ['serif'])
+
+    def test_fallback(self):
+        """Test for fonts the fast path doesn't deal with."""
+        with self.assertRaises(ValueError):
+            fr.SfntReader(self.woff)
+        self.assertEqual(fr.font_meta_reader(self.woff)['family'], 'Foo Sans')
+
+    def test_faces_meta_reader(self):
+        """Test for faces_meta_reader."""
+        self.assertEqual(fr.num_faces(self.ttf), 1)
+        self.assertEqual(fr.num_faces(self.ttc), 2)
+        self.assertEqual([m['family'] for m in fr.faces_meta_reader(self.ttc)],
+                         ['Foo Sans', 'Bar Serif'])
+
+    def test_is_variable(self):
+        """Test for is_variable."""
+        vf = str(Path(self.tmpdir.name) / 'foo-vf.ttf')
+        vttc = str(Path(self.tmpdir.name) / 'foo-vf.ttc')
+        build_font(vf, 'Foo Sans', variable=True)
+        c = TTCollection()
+        c.fonts = [TTFont(self.ttf), TTFont(vf)]
+        c.save(vttc)
+        self.assertFalse(fr.is_variable(self.ttf))
+        self.assertFalse(fr.is_variable(self.ttc))
+        self.assertFalse(fr.is_variable(self.woff))
+        self.assertTrue(fr.is_variable(vf))
+        self.assertTrue(fr.is_variable(vttc))
+        # The font has fvar but no gvar.
+        self.assertEqual([x['variable'] for x in fr.faces_meta_reader(vttc)],
+                         [False, True])
+        self.assertTrue(fr.font_meta_reader(vf)['variable'])
+
+    def test_pcf(self):
+        """Test for PCF fonts."""
+        pcf = str(Path(self.tmpdir.name) / 'foo.pcf')
+        pcfgz = str(Path(self.tmpdir.name) / 'bar.pcf.gz')
+        build_pcf(pcf, {'FAMILY_NAME': 'Fixed', 'FOUNDRY': 'Misc',
+                        'WEIGHT_NAME': 'Bold', 'SPACING': 'C',
+                        'PIXEL_SIZE': 13})
+        build_pcf(pcfgz, {'FONT': '-xos4-Terminus Sans-medium-r-normal--'
+                          '12-120-72-72-p-60-iso10646-1'}, msb=True)
+        self.assertEqual(fr.PcfReader(pcf).properties['PIXEL_SIZE'], 13)
+        meta = fr.font_meta_reader(pcf)
+        self.assertEqual(meta['family'], 'Fixed')
+        self.assertEqual(meta['SubFamily'], 'Bold')
+        self.assertEqual(meta['foundry'], 'Misc')
+        self.assertEqual(meta['type'], 'Bitmap')
+        self.assertEqual(meta['alias'], ['monospace'])
+        meta = fr.faces_meta_reader(pcfgz)[0]
+        self.assertEqual(meta['family'], 'Terminus Sans')
+        self.assertEqual(meta['foundry'], 'xos4')
+        self.assertEqual(meta['alias'], ['sans-serif'])
+        self.assertFalse(fr.is_variable(pcfgz))
+        bogus = Path(self.tmpdir.name) / 'bogus.pcf'
+        bogus.write_bytes(Path(self.ttf).read_bytes())
+        with self.assertRaises(ValueError):
+            fr.font_meta_reader(str(bogus))
+
+
+class TestGroup(unittest.TestCase):
+    """Test case for group."""
+
+    def meta(self, family, variable=False):
+        """Build a dummy metadata."""
+        return {'family': family, 'variable': variable}
+
+    def test_group(self):
+        """Test for group."""
+        g = fr.group({
+            'foo-bold.ttf': self.meta('Foo'),
+            'foo.ttf': self.meta('Foo'),
+            'foo-vf.ttf': self.meta('Foo', True),
+            'bar.ttf': self.meta('Bar Sans'),
+        })
+        self.assertEqual(list(g.keys()), ['Foo', 'Foo VF', 'Bar Sans'])
+        self.assertEqual([v['file'] for v in g['Foo']],
+                         ['foo-bold.ttf', 'foo.ttf'])
+
+    def test_group_collection(self):
+        """Test for group with faces in a font collection."""
+        g = fr.group({
+            ('foo.ttc', 0): self.meta('Foo Sans'),
+            ('foo.ttc', 1): self.meta('Foo Serif'),
+            ('bar.ttf', 0): self.meta('Foo Serif'),
+        })
+        self.assertEqual(list(g.keys()), ['Foo Sans', 'Foo Serif'])
+        self.assertEqual([(v['file'], v['index']) for v in g['Foo Sans']],
+                         [('foo.ttc', 0), ('foo.ttc', 1)])
+        self.assertEqual([v['file'] for v in g['Foo Serif']], ['bar.ttf'])
+
+    def test_group_special_chars(self):
+        """Test for group with family names containing regex metacharacters."""
+        g = fr.group({
+            'foo.ttf': self.meta('Foo (Bar)'),
+            'foo-bold.ttf': self.meta('Foo (Bar)'),
+            'cpp.ttf': self.meta('C++ Mono'),
+            'dot.ttf': self.meta('Foo.Sans'),
+            'x.ttf': self.meta('FooXSans'),
+        })
+        self.assertEqual(list(g.keys()),
+                         ['C++ Mono', 'Foo.Sans', 'FooXSans', 'Foo (Bar)'])
+        self.assertEqual([v['file'] for v in g['Foo (Bar)']],
+                         ['foo.ttf', 'foo-bold.ttf'])
+        self.assertEqual([v['file'] for v in g['FooXSans']], ['x.ttf'])
+
+
+if __name__ == '__main__':
+    unittest.main()
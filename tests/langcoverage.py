@@ -0,0 +1,98 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Unit test for langcoverage.py."""
+
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec.langcoverage import LangCoverage, bitset, npages
+
+
+def build_font(fn: str, codepoints: list[int],
+               codepage_range: int = 0) -> None:
+    """Build a small TrueType font covering `codepoints`."""
+    names = ['.notdef'] + ['uni{:04X}'.format(c) for c in codepoints]
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(names)
+    fb.setupCharacterMap(dict(zip(codepoints, names[1:])))
+    glyphs = {}
+    for n in names:
+        pen = TTGlyphPen(None)
+        pen.moveTo((0, 0))
+        pen.lineTo((0, 500))
+        pen.lineTo((500, 0))
+        pen.closePath()
+        glyphs[n] = pen.glyph()
+    fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics({n: (600, 0) for n in names})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': 'Foo', 'styleName': 'Regular'})
+    fb.setupOS2(ulCodePageRange1=codepage_range)
+    fb.setupPost()
+    fb.save(fn)
+
+
+class TestLangCoverage(unittest.TestCase):
+    """Test case for LangCoverage class."""
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name)
+        (self.path / 'aa.orth').write_text('# comment\n0041-0043\n')
+        (self.path / 'ab.orth').write_text('include aa.orth\n0044\n')
+        (self.path / 'zh_tw.orth').write_text('4e00..4e01\n')
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_bitset(self):
+        """Test for bitset and npages."""
+        self.assertEqual(bitset([]), 0)
+        self.assertEqual(bitset([0, 3]), 0b1001)
+        self.assertEqual(npages(bitset([0x41, 0x42, 0x4e00])), 2)
+
+    def test_languages(self):
+        """Test for languages."""
+        lc = LangCoverage.from_orth_dir(self.path)
+        fn = str(self.path / 'foo.ttf')
+        build_font(fn, [0x41, 0x42, 0x43])
+        self.assertEqual(lc.languages(fn), ['aa'])
+        build_font(fn, [0x41, 0x42, 0x43, 0x44, 0x4e00, 0x4e01])
+        self.assertEqual(lc.languages(fn), ['aa', 'ab', 'zh-tw'])
+        self.assertEqual(lc.languages_many([fn, str(self.path / 'aa.orth')]),
+                         {fn: ['aa', 'ab', 'zh-tw'],
+                          str(self.path / 'aa.orth'): None})
+
+    def test_exclusive(self):
+        """Test for the languages declared in OS/2 table."""
+        (self.path / 'ja.orth').write_text('3041\n4e00\n')
+        (self.path / 'zh_cn.orth').write_text('3042\n4e00\n')
+        (self.path / 'ko.orth').write_text('3041\n4e00\n')
+        lc = LangCoverage.from_orth_dir(self.path)
+        fn = str(self.path / 'foo.ttf')
+        build_font(fn, [0x3041, 0x3042, 0x4e00, 0x4e01])
+        self.assertEqual(lc.languages(fn), ['ja', 'ko', 'zh-cn', 'zh-tw'])
+        # Same number of pages but different code points.
+        build_font(fn, [0x3041, 0x3042, 0x4e00, 0x4e01], 1 << 17)
+        self.assertEqual(lc.languages(fn), ['ja', 'ko'])
+
+    def test_broken(self):
+        """Test for broken fonts."""
+        lc = LangCoverage.from_orth_dir(self.path)
+        fn = self.path / 'foo.ttc'
+        # Truncated after the number of fonts.
+        fn.write_bytes(b'ttcf' + struct.pack('>HHL', 1, 0, 2))
+        self.assertIsNone(lc.languages(str(fn)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Unit test for rpm_reader.py."""
+
+import gzip
+import lzma
+import stat
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import rpm_reader as rr
+from fontrpmspec import sources as src
+
+
+def build_header(entries: list[tuple[int, int, object]]) -> bytes:
+    """Build a header structure from a list of tag, type and value."""
+    index = b''
+    store = b''
+    for tag, typ, value in entries:
+        if typ == rr.RPM_INT32_TYPE:
+            store += b'\0' * ((4 - len(store) % 4) % 4)
+            data = struct.pack('>{}L'.format(len(value)), *value)
+            count = len(value)
+        elif typ == rr.RPM_STRING_TYPE:
+            data = value.encode('utf-8') + b'\0'
+            count = 1
+        else:
+            data = b''.join(v.encode('utf-8') + b'\0' for v in value)
+            count = len(value)
+        index += struct.pack('>lLlL', tag, typ, len(store), count)
+        store += data
+    return (rr.HEADER_MAGIC + b'\x01' + b'\0' * 4 +
+            struct.pack('>LL', len(entries), len(store)) + index + store)
+
+
+def build_cpio(files: dict[str, bytes | str]) -> bytes:
+    """Build a cpio archive in newc format. str value is a symlink."""
+    data = b''
+    for i, (name, v) in enumerate(list(files.items()) +
+                                  [('TRAILER!!!', b'')]):
+        if isinstance(v, str):
+            mode = stat.S_IFLNK | 0o777
+            v = v.encode('utf-8')
+        else:
+            mode = stat.S_IFREG | 0o644 if name != 'TRAILER!!!' else 0
+        n = name.encode('utf-8') + b'\0'
+        fields = [i + 1, mode, 0, 0, 1, 0, len(v), 0, 0, 0, 0, len(n), 0]
+        data += b'070701' + ''.join('{:08X}'.format(x)
+                                    for x in fields).encode('ascii')
+        data += n + b'\0' * ((4 - (110 + len(n)) % 4) % 4)
+        data += v + b'\0' * ((4 - len(v) % 4) % 4)
+    return data
+
+
+def build_rpm(fn: str, name: str, files: dict[str, bytes | str],
+              compressor: str = 'gzip') -> None:
+    """Build a RPM package which contains `files`."""
+    lead = rr.LEAD_MAGIC + b'\x03\x00' + b'\0' * 90
+    sig = build_header([(1000, rr.RPM_INT32_TYPE, [0])])
+    sig += b'\0' * ((8 - len(sig) % 8) % 8)
+    names = ['/' + k.lstrip('./') for k in files]
+    header = build_header([
+        (rr.RPMTAG_NAME, rr.RPM_STRING_TYPE, name),
+        (rr.RPMTAG_VERSION, rr.RPM_STRING_TYPE, '1.0'),
+        (rr.RPMTAG_RELEASE, rr.RPM_STRING_TYPE, '1'),
+        (rr.RPMTAG_DIRINDEXES, rr.RPM_INT32_TYPE,
+         list(range(len(names)))),
+        (rr.RPMTAG_BASENAMES, rr.RPM_STRING_ARRAY_TYPE,
+         [Path(n).name for n in names]),
+        (rr.RPMTAG_DIRNAMES, rr.RPM_STRING_ARRAY_TYPE,
+         [str(Path(n).parent) + '/' for n in names]),
+        (rr.RPMTAG_PAYLOADFORMAT, rr.RPM_STRING_TYPE, 'cpio'),
+        (rr.RPMTAG_PAYLOADCOMPRESSOR, rr.RPM_STRING_TYPE, compressor),
+    ])
+    payload = build_cpio(files)
+    payload = {'gzip': gzip.compress,
+               'xz': lzma.compress}[compressor](payload)
+    Path(fn).write_bytes(lead + sig + header + payload)
+
+
+class TestRpmReader(unittest.TestCase):
+    """Test case for RpmReader class."""
+
+    FILES = {
+        './usr/share/fonts/foo/foo.ttf': b'\0' * 1001,
+        './usr/share/fonts/foo/bar.ttf': 'foo.ttf',
+        './usr/share/fontconfig/conf.avail/69-foo.conf': b'<fontconfig/>',
+        './usr/share/doc/foo/specimen.pdf': b'\0' * 500,
+    }
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_header(self):
+        """Test for the header."""
+        fn = str(self.path / 'foo-fonts-1.0-1.noarch.rpm')
+        build_rpm(fn, 'foo-fonts', self.FILES)
+        r = rr.RpmReader(fn)
+        self.assertEqual(r.name, 'foo-fonts')
+        self.assertEqual(r.version, '1.0')
+        self.assertEqual(r.release, '1')
+        self.assertEqual(r.files, [k[1:] for k in self.FILES])
+        with self.assertRaises(ValueError):
+            rr.RpmReader(__file__)
+
+    def test_members(self):
+        """Test for members in the payload."""
+        for compressor in ['gzip', 'xz']:
+            fn = str(self.path / 'foo.rpm')
+            build_rpm(fn, 'foo-fonts', self.FILES, compressor)
+            members = {}
+            for name, size, opener, link in rr.RpmReader(fn).members():
+                if opener is not None:
+                    with opener() as f:
+                        members[name] = f.read()
+                else:
+                    members[name] = link
+            self.assertEqual(members, {
+                'usr/share/fonts/foo/foo.ttf': b'\0' * 1001,
+                'usr/share/fonts/foo/bar.ttf': 'usr/share/fonts/foo/foo.ttf',
+                'usr/share/fontconfig/conf.avail/69-foo.conf':
+                b'<fontconfig/>',
+                'usr/share/doc/foo/specimen.pdf': b'\0' * 500,
+            })
+
+    def test_source(self):
+        """Test for RPM package in Source."""
+        build_rpm(str(self.path / 'foo.rpm'), 'foo-fonts', self.FILES)
+        s = src.Source('foo.rpm', self.tmpdir.name)
+        files = {f.name: f.fullname.exists() for f in s}
+        self.assertEqual(files, {
+            'share/fonts/foo/foo.ttf': True,
+            'share/fonts/foo/bar.ttf': True,
+            'share/fontconfig/conf.avail/69-foo.conf': True,
+            'share/doc/foo/specimen.pdf': False,
+        })
+        self.assertEqual(s.root, 'usr')
+        self.assertEqual(s.skipped, (1, 500))
+        s.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,12 +18,41 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Unit test for classes in sources.py."""
 
+import hashlib
+import shutil
+import tarfile
+import tempfile
 import unittest
+import zipfile
+from pathlib import Path
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
 try:
     import _debugpath  # noqa: F401
 except ModuleNotFoundError:
     pass
 from fontrpmspec import sources as src
+from fontrpmspec.cache import ExtractCache
+from fontrpmspec.messages import Message
+
+
+def build_font(fn: str, family: str) -> None:
+    """Build a small TrueType font."""
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(['.notdef'])
+    fb.setupCharacterMap({})
+    pen = TTGlyphPen(None)
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 500))
+    pen.lineTo((500, 0))
+    pen.closePath()
+    fb.setupGlyf({'.notdef': pen.glyph()})
+    fb.setupHorizontalMetrics({'.notdef': (600, 0)})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({'familyName': family, 'styleName': 'Regular'})
+    fb.setupOS2(sFamilyClass=8 << 8, achVendID='ADBO')
+    fb.setupPost()
+    fb.save(fn)
 
 
 class TestSource(unittest.TestCase):
@@ -258,6 +287,57 @@ class TestFile(unittest.TestCase):
         self.assertEqual(self.font_from_archive_sub.is_fontconfig(), False)
         self.assertEqual(self.fc_from_source.is_fontconfig(), True)
 
+    def test_kind(self):
+        """Test for kind."""
+        self.assertEqual(self.license_from_source.kind, 'license')
+        self.assertEqual(self.doc_from_source.kind, 'doc')
+        self.assertEqual(self.doc_from_archive.kind, 'doc')
+        self.assertEqual(self.font_from_web_query.kind, 'font')
+        self.assertEqual(self.font_from_archive_sub.kind, 'font')
+        self.assertEqual(self.fc_from_source.kind, 'fontconfig')
+        for name, kind in [('requirements.txt', None),
+                           ('foo/requirements.txt', 'doc'),
+                           ('NEWS', 'doc'),
+                           ('misc/foo.pcf.gz', 'font'),
+                           ('foo.TTF', None),
+                           ('metainfo/foo.metainfo.xml', 'xml'),
+                           ('fontconfig/README', 'doc'),
+                           ('foo', None)]:
+            self.assertEqual(src.File('foo-1.0/' + name, '.').kind, kind,
+                             name)
+
+    def test_fontconfig(self):
+        """Test for properties of fontconfig file."""
+        with tempfile.TemporaryDirectory() as d:
+            (Path(d) / '69-foo.conf').write_text('''<fontconfig>
+  <match target="scan">
+    <test name="family"><string>Foo Old</string></test>
+    <edit name="family"><string>Foo</string></edit>
+  </match>
+  <match target="scan">
+    <test name="family"><string>Foo</string></test>
+    <edit name="family"><string>Foo Sans</string></edit>
+  </match>
+  <match>
+    <test name="lang"><string>ja</string></test>
+    <test name="family"><string>sans-serif</string></test>
+    <edit name="family"><string>Foo Old</string></edit>
+  </match>
+  <alias>
+    <family>Foo Old</family>
+    <default><family>sans-serif</family></default>
+  </alias>
+</fontconfig>''')
+            f = src.File('69-foo.conf', d)
+            self.assertEqual(f.family_map(), {'Foo Old': 'Foo',
+                                              'Foo': 'Foo Sans'})
+            (Path(d) / '69-foo.conf').unlink()
+            # Everything comes from the document parsed once.
+            self.assertEqual(f.families, ['Foo', 'Foo Old', 'Foo Sans'])
+            self.assertEqual(f.aliases, ['sans-serif'])
+            self.assertEqual(f.languages, ['ja'])
+            self.assertTrue(f.has_family_map())
+
     def test_is_source(self):
         """Test for is_source."""
         self.assertEqual(self.license_from_source.is_source(), True)
@@ -273,5 +353,312 @@ class TestFile(unittest.TestCase):
         self.assertEqual(self.fc_from_source.is_source(), True)
 
 
+class TestSourceIter(unittest.TestCase):
+    """Test case for iterating files in archives."""
+
+    FILES = {
+        'foo-1.0/OFL.txt': b'license',
+        'foo-1.0/README.md': b'readme',
+        'foo-1.0/ttf/foo.ttf': b'\0' * 4096,
+    }
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name)
+        with zipfile.ZipFile(self.path / 'foo-1.0.zip', 'w') as z:
+            for k, v in self.FILES.items():
+                z.writestr(k, v)
+        with tarfile.open(self.path / 'foo-1.0.tar.xz', 'w:xz') as t:
+            for k, v in self.FILES.items():
+                fn = self.path / 'tmp' / k
+                fn.parent.mkdir(parents=True, exist_ok=True)
+                fn.write_bytes(v)
+                t.add(fn, k)
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        self.tmpdir.cleanup()
+
+    def test_streaming(self):
+        """Test for iterating files in streaming mode."""
+        for archive in ['foo-1.0.zip', 'foo-1.0.tar.xz']:
+            s = src.Source(archive, self.tmpdir.name, streaming=True)
+            names = {}
+            prev = None
+            for f in s:
+                if prev is not None:
+                    self.assertFalse(prev.fullname.exists())
+                with f.open() as fp:
+                    names[f.name] = fp.read()
+                prev = f
+            s.cleanup()
+            self.assertTrue(s.is_archive())
+            self.assertEqual(s.root, 'foo-1.0')
+            self.assertEqual(names, {k.replace('foo-1.0/', ''): v
+                                     for k, v in self.FILES.items()})
+
+    def test_selective(self):
+        """Test for skipping files not needed for packaging."""
+        with tarfile.open(self.path / 'bar.tar.gz', 'w:gz') as t:
+            for k, v in {'bar/OFL.txt': b'license',
+                         'bar/specimen.pdf': b'\0' * 100,
+                         'bar/src/bar.ttf': b'\0' * 10,
+                         'bar/src/README': b'readme',
+                         'bar/ttf/bar.ttf': b'\0' * 10}.items():
+                fn = self.path / 'tmp' / k
+                fn.parent.mkdir(parents=True, exist_ok=True)
+                fn.write_bytes(v)
+                t.add(fn, k)
+        s = src.Source('bar.tar.gz', self.tmpdir.name, excludepath=['src/'])
+        files = {f.name: f.fullname.exists() for f in s}
+        # Only fonts are excluded.
+        self.assertEqual(files, {'OFL.txt': True, 'specimen.pdf': False,
+                                 'src/bar.ttf': False, 'src/README': True,
+                                 'ttf/bar.ttf': True})
+        self.assertEqual(s.skipped, (1, 100))
+        self.assertEqual(s.excluded, (1, 10))
+        s.cleanup()
+
+    def test_scan_tree(self):
+        """Test for walking a tree with excluded directories."""
+        for k in ['a/OFL.txt', 'a/src/x.ttf', 'a/src/b/y.ttf', 'a/ttf/z.ttf',
+                  'a/web/w.ttf']:
+            fn = self.path / 'tree' / k
+            fn.parent.mkdir(parents=True, exist_ok=True)
+            fn.write_bytes(b'\0' * 10)
+        visited = []
+        matcher = src.PathMatcher(['src/', 'web'])
+
+        def prune(name):
+            visited.append(name)
+            return matcher.match_dir(name.split('/', 1)[1]) if (
+                '/' in name) else False
+
+        files = {n: e.stat().st_size for n, e in src.scan_tree(
+            str(self.path / 'tree'), prune)}
+        self.assertEqual(files, {'a/OFL.txt': 10, 'a/ttf/z.ttf': 10})
+        self.assertEqual(visited, ['a', 'a/src', 'a/ttf', 'a/web'])
+        self.assertTrue(matcher.match('web/w.ttf'))
+        self.assertFalse(matcher.match('ttf/src/x.ttf'))
+        self.assertFalse(src.PathMatcher())
+        s = src.Source('foo-1.0.tar.xz', self.tmpdir.name,
+                       excludepath=['OFL', 'ttf/'])
+        self.assertEqual([f.name for f in s if f.is_needed(s.excludepath)],
+                         ['OFL.txt', 'README.md'])
+        s.cleanup()
+        # Formats which Source doesn't iterate members by itself.
+        shutil.copyfile(self.path / 'foo-1.0.tar.xz', self.path / 'foo.txz2')
+        shutil.register_unpack_format(
+            'txz2', ['.txz2'],
+            lambda fn, path: tarfile.open(fn).extractall(path))
+        try:
+            s = src.Source('foo.txz2', self.tmpdir.name,
+                           excludepath=['ttf/'])
+            self.assertEqual(sorted(f.name for f in s),
+                             ['OFL.txt', 'README.md'])
+            self.assertEqual(s.root, 'foo-1.0')
+            s.cleanup()
+        finally:
+            shutil.unregister_unpack_format('txz2')
+
+    def test_iter_files(self):
+        """Test for extracting files in background."""
+        with tarfile.open(self.path / 'bar.tar', 'w') as t:
+            for k, v in self.FILES.items():
+                t.add(self.path / 'tmp' / k, k)
+            t.add(self.path / 'tmp' / 'foo-1.0/OFL.txt', '../OFL.txt')
+        (self.path / 'FOO.conf').write_bytes(b'<fontconfig/>')
+        results = []
+        for maxsize in [0, 1]:
+            sources = src.Sources(['bar.tar', 'FOO.conf'], self.tmpdir.name)
+            with Message.hold() as held:
+                result = []
+                for s, f in src.iter_files(sources, maxsize):
+                    Message().message(f and f.name).out()
+                    result.append((s.realname, f and f.name))
+                    if f is None:
+                        s.cleanup()
+            results.append((result, held))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0][-2:], [('FOO.conf', 'FOO.conf'),
+                                              ('FOO.conf', None)])
+        # The warning from the background thread comes in the same order.
+        self.assertIn('../OFL.txt', results[0][1][3])
+        self.assertEqual(results[0][1][4], 'OFL.txt')
+        sources = src.Sources(['missing.tar', 'FOO.conf'], self.tmpdir.name)
+        with self.assertRaises(FileNotFoundError):
+            list(src.iter_files(sources, 1))
+
+    def test_tar_link(self):
+        """Test for links and large files in tar."""
+        with tarfile.open(self.path / 'baz.tar', 'w') as t:
+            # Before the target.
+            info = tarfile.TarInfo('foo-1.0/baz.ttf')
+            info.type = tarfile.SYMTYPE
+            info.linkname = 'ttf/foo.ttf'
+            t.addfile(info)
+            for k, v in self.FILES.items():
+                t.add(self.path / 'tmp' / k, k)
+            info = tarfile.TarInfo('foo-1.0/ttf/bar.ttf')
+            info.type = tarfile.SYMTYPE
+            info.linkname = 'foo.ttf'
+            t.addfile(info)
+            info = tarfile.TarInfo('foo-1.0/missing.ttf')
+            info.type = tarfile.SYMTYPE
+            info.linkname = 'none.ttf'
+            t.addfile(info)
+        cache = ExtractCache(str(self.path / 'cache'))
+        for kwargs in [{}, {'extract_cache': cache}]:
+            s = src.Source('baz.tar', self.tmpdir.name, **kwargs)
+            with Message.hold() as held:
+                files = {f.name: f.content() for f in s}
+            self.assertEqual(len(held), 1)
+            self.assertIn('missing.ttf', held[0])
+            for n in ['ttf/bar.ttf', 'baz.ttf']:
+                self.assertEqual(Path(files[n]).read_bytes(),
+                                 self.FILES['foo-1.0/ttf/foo.ttf'])
+            s.cleanup()
+        # Same in streaming mode, for the links before and after the target.
+        s = src.Source('baz.tar', self.tmpdir.name, streaming=True)
+        s.spool_max_size = 1024
+        with Message.hold() as held:
+            files = {f.name: bytes(f.content()) for f in s
+                     if f.is_needed()}
+        self.assertEqual(len(held), 1)
+        self.assertIn('missing.ttf', held[0])
+        for n in ['ttf/foo.ttf', 'ttf/bar.ttf', 'baz.ttf']:
+            self.assertEqual(files[n], self.FILES['foo-1.0/ttf/foo.ttf'])
+        s.cleanup()
+
+    def test_streaming_records(self):
+        """Test for the files kept after extracting in streaming mode."""
+        build_font(str(self.path / 'tmp' / 'foo-1.0/ttf/foo.ttf'), 'Foo')
+        with tarfile.open(self.path / 'foo-1.0.tar.xz', 'w:xz') as t:
+            for k in self.FILES:
+                t.add(self.path / 'tmp' / k, k)
+        exdata = src.extract('foo', '1.0', ['foo-1.0.tar.xz'],
+                             self.tmpdir.name, excludepath=[], cache=False,
+                             cachedir=None, jobs=1, streaming=True,
+                             download_jobs=1, extract_cache=False)
+        files = exdata['licenses'] + exdata['docs'] + exdata['fonts']
+        self.assertEqual([f.name for f in files],
+                         ['OFL.txt', 'README.md', 'ttf/foo.ttf'])
+        # The spools are released.
+        self.assertEqual([type(f) for f in files], [src.File] * 3)
+
+    def test_zip(self):
+        """Test for reading files in ZIP without extracting."""
+        with zipfile.ZipFile(self.path / 'bar.zip', 'w') as z:
+            z.writestr('bar/stored.ttf', b'stored', zipfile.ZIP_STORED)
+            z.writestr('bar/deflated.ttf', b'deflated', zipfile.ZIP_DEFLATED)
+        s = src.Source('bar.zip', self.tmpdir.name)
+        files = {f.name: f for f in s}
+        self.assertEqual(s.root, 'bar')
+        self.assertIsInstance(files['stored.ttf'].content(), memoryview)
+        self.assertEqual(bytes(files['stored.ttf'].content()), b'stored')
+        self.assertEqual(files['deflated.ttf'].content(), b'deflated')
+        with files['deflated.ttf'].open() as f:
+            self.assertEqual(f.read(), b'deflated')
+        s.cleanup()
+
+    def test_extract_cache(self):
+        """Test for reusing extracted files from the cache."""
+        cache = ExtractCache(str(self.path / 'cache'))
+        for archive in ['foo-1.0.zip', 'foo-1.0.tar.xz']:
+            expected = {}
+            for excludepath in [[], ['ttf/']]:
+                s = src.Source(archive, self.tmpdir.name,
+                               excludepath=excludepath, extract_cache=cache)
+                files = {f.name: f.fullname.exists() for f in s}
+                self.assertEqual(files, {'OFL.txt': True, 'README.md': True,
+                                         'ttf/foo.ttf': True})
+                self.assertEqual(s.skipped, (0, 0))
+                self.assertEqual(s.excluded, (len(excludepath), 4096 * len(
+                    excludepath)))
+                self.assertEqual(s.root, 'foo-1.0')
+                s.cleanup()
+                # The tree is still available after cleaning up.
+                for f in s:
+                    self.assertTrue(f.fullname.exists())
+                    self.assertTrue(str(f.fullname).startswith(
+                        str(cache.path)))
+                    expected[f.name] = f.fullname
+        self.assertEqual(len(list(cache.path.glob('*/*'))), 2)
+        self.assertEqual(expected['ttf/foo.ttf'].read_bytes(),
+                         self.FILES['foo-1.0/ttf/foo.ttf'])
+        self.assertEqual(expected['ttf/foo.ttf'].stat().st_mode & 0o222, 0)
+
+    def test_digest(self):
+        """Test for the hash computed while extracting."""
+        digest = hashlib.sha256(self.FILES['foo-1.0/ttf/foo.ttf']).hexdigest()
+        cache = ExtractCache(str(self.path / 'cache'))
+        for kwargs in [{}, {'streaming': True}, {'extract_cache': cache},
+                       {'extract_cache': cache}]:
+            s = src.Source('foo-1.0.tar.xz', self.tmpdir.name, **kwargs)
+            for f in s:
+                if f.is_font():
+                    self.assertEqual(f._digest, digest)
+                    self.assertEqual(f.digest(), digest)
+            s.cleanup()
+
+    def test_duplicates(self):
+        """Test for identical font files in archive."""
+        build_font(str(self.path / 'foo.ttf'), 'Foo')
+        build_font(str(self.path / 'bar.ttf'), 'Bar')
+        build_font(str(self.path / 'baz.ttf'), 'Baz')
+        with zipfile.ZipFile(self.path / 'foo-2.0.zip', 'w') as z:
+            z.write(self.path / 'foo.ttf', 'foo-2.0/ttf/foo.ttf')
+            z.write(self.path / 'foo.ttf', 'foo-2.0/static/foo.ttf')
+            z.write(self.path / 'foo.ttf', 'foo-2.0/static/Foo-Regular.ttf')
+            z.write(self.path / 'bar.ttf', 'foo-2.0/ttf/bar.ttf')
+            # Same name but different content.
+            z.write(self.path / 'baz.ttf', 'foo-2.0/otf/foo.ttf')
+        digest = hashlib.sha256(
+            (self.path / 'foo.ttf').read_bytes()).hexdigest()
+        results = []
+        # Members are read in the pool with jobs.
+        for jobs in [1, 2]:
+            with Message.hold() as held:
+                exdata = src.extract('foo', '2.0', ['foo-2.0.zip', 'foo.ttf'],
+                                     self.tmpdir.name, excludepath=[],
+                                     cache=False, cachedir=None, jobs=jobs,
+                                     streaming=False, download_jobs=1,
+                                     extract_cache=False)
+            self.assertEqual([f.name for f in exdata['fonts']],
+                             ['ttf/foo.ttf', 'ttf/bar.ttf', 'otf/foo.ttf'])
+            self.assertEqual(sorted(k[0] for k in exdata['fontinfo']),
+                             ['otf/foo.ttf', 'ttf/bar.ttf', 'ttf/foo.ttf'])
+            self.assertEqual(exdata['duplicates'], {
+                digest: ['ttf/foo.ttf', 'static/foo.ttf',
+                         'static/Foo-Regular.ttf', 'foo.ttf']
+            })
+            self.assertFalse(any('Possibly' in x for x in held))
+            self.assertEqual(exdata['sources'], [])
+            results.append((exdata['fontinfo'], held))
+        self.assertEqual(results[0], results[1])
+
+    def test_excludepath(self):
+        """Test for excluding fonts in extract."""
+        build_font(str(self.path / 'foo.ttf'), 'Foo')
+        with zipfile.ZipFile(self.path / 'foo-2.0.zip', 'w') as z:
+            z.write(self.path / 'foo.ttf', 'foo-2.0/ttf/foo.ttf')
+            z.write(self.path / 'foo.ttf', 'foo-2.0/web/foo.ttf')
+            z.writestr('foo-2.0/web/OFL.txt', 'license')
+        with Message.hold() as held:
+            exdata = src.extract('foo', '2.0', ['foo-2.0.zip'],
+                                 self.tmpdir.name, excludepath=['web/'],
+                                 cache=False, cachedir=None, jobs=1,
+                                 streaming=False, download_jobs=1,
+                                 extract_cache=False)
+        self.assertEqual([f.name for f in exdata['fonts']], ['ttf/foo.ttf'])
+        self.assertEqual(exdata['duplicates'], {})
+        # Others are still packaged.
+        self.assertEqual([f.name for f in exdata['licenses']],
+                         ['web/OFL.txt'])
+        self.assertTrue(any('Excluded 1 font files' in x for x in held))
+        self.assertFalse(any('Skipped' in x for x in held))
+
+
 if __name__ == '__main__':
     unittest.main()
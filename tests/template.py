@@ -0,0 +1,69 @@
+# Copyright (C) 2026 font-rpm-spec-generator Authors
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""Unit test for template.py."""
+
+import tempfile
+import unittest
+from pathlib import Path
+try:
+    import _debugpath  # noqa: F401
+except ModuleNotFoundError:
+    pass
+from fontrpmspec import template
+from fontrpmspec.messages import Message
+
+
+class TestTemplate(unittest.TestCase):
+    """Test case for the shared environment."""
+
+    def setUp(self):
+        """Initialize common variables."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        template._environment = None
+        template._cache_failed = False
+
+    def tearDown(self):
+        """Clean up a temporary directory."""
+        template._environment = None
+        template._cache_failed = False
+        self.tmpdir.cleanup()
+
+    def test_environment(self):
+        """Test for reusing compiled templates."""
+        env = template.environment()
+        self.assertIs(template.environment(), env)
+        self.assertIsNone(env.bytecode_cache)
+        fn = template.TEMPLATES['simple']
+        self.assertIs(env.get_template(fn), env.get_template(fn))
+
+    def test_prewarm(self):
+        """Test for compiling templates in advance with the bytecode cache."""
+        template.prewarm(cache=True, cachedir=self.tmpdir.name)
+        env = template.environment()
+        self.assertIsNotNone(env.bytecode_cache)
+        self.assertEqual(len(list((Path(self.tmpdir.name) /
+                                   'template').iterdir())),
+                         len(template.TEMPLATES))
+        # Another process loads them from the disk.
+        template._environment = None
+        env = template.environment(cache=True, cachedir=self.tmpdir.name)
+        fn = template.TEMPLATES['multi']
+        source, filename, uptodate = env.loader.get_source(env, fn)
+        bucket = env.bytecode_cache.get_bucket(env, fn, filename, source)
+        self.assertIsNotNone(bucket.code)
+
+    def test_unusable_cachedir(self):
+        """Test for the cache directory which can't be created."""
+        fn = Path(self.tmpdir.name) / 'file'
+        fn.write_text('')
+        with Message.hold() as held:
+            env = template.environment(cache=True, cachedir=str(fn))
+            template.environment(cache=True, cachedir=str(fn))
+        self.assertIsNone(env.bytecode_cache)
+        self.assertEqual(len(held), 1)
+        self.assertIn('Unable to update cache', held[0])
+        self.assertIn('spec', template.get(1, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()